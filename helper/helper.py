@@ -6,16 +6,27 @@ Runs as root via pkexec/polkit.
 Communicates strictly via JSON on stdin/stdout.
 
 Supported actions:
-- list_profiles
+- list_profiles (with metadata from the catalog index)
 - install_profile
-- connect
+- connect (optional resolved_remotes: {hostname: [ip, ...]})
 - disconnect
 - status
+- switch (stop the active profile, start another, roll back on failure)
+- update_profile (one profile, or many via "profiles": [...])
+- set_split_tunnel (route-nopull + explicit routes, or clear)
+- remove_profile
 """
 
+import fcntl
+import hashlib
+import ipaddress
 import json
+import os
 import sys
 import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
 from pathlib import Path
 
 # ==================================================
@@ -24,6 +35,29 @@ from pathlib import Path
 
 OPENVPN_DIR = "/etc/openvpn"
 
+# Root-only helper state
+STATE_DIR = "/var/lib/openvpn-desk"
+STATE_LOCK = "lock"
+
+# Content-addressed store for inline certificates/keys, keyed by SHA-256
+STORE_DIR = "/var/lib/openvpn-desk/store"
+STORE_REFS = "refs.json"
+
+# Metadata index of installed profiles, validated against directory mtime
+CATALOG_FILE = "catalog.json"
+CATALOG_VERSION = 1
+
+# Inline blocks moved into the store and replaced by a file reference
+STORED_INLINE_TAGS = (
+    "ca",
+    "cert",
+    "key",
+    "extra-certs",
+    "tls-auth",
+    "tls-crypt",
+    "tls-crypt-v2",
+)
+
 ALLOWED_NAME_CHARS = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-"
 
 DISALLOWED_DIRECTIVES = (
@@ -35,6 +69,54 @@ DISALLOWED_DIRECTIVES = (
     "management ",
 )
 
+# Remote lines generated from pre-resolved addresses follow this marker,
+# ahead of the original hostname line which stays as a fallback.
+RESOLVED_MARKER = "# openvpn-desk:resolved"
+MAX_RESOLVED_PER_HOST = 8
+
+# Split-tunnel routes live between these markers in the installed config
+SPLIT_BEGIN = "# openvpn-desk:split-tunnel begin"
+SPLIT_END = "# openvpn-desk:split-tunnel end"
+MAX_SPLIT_ROUTES = 20000
+
+# Comments starting with this are ours; imported copies are dropped
+MARKER_PREFIX = "# openvpn-desk:"
+
+# Seconds a switch target gets to come up before rolling back
+SWITCH_TIMEOUT = 30
+SWITCH_TIMEOUT_MAX = 120
+SWITCH_POLL_INTERVAL = 0.1
+
+# Directives that can change without restarting an active tunnel
+NON_CONNECTION_DIRECTIVES = (
+    "verb",
+    "mute",
+    "mute-replay-warnings",
+    "status",
+    "status-version",
+    "log",
+    "log-append",
+    "suppress-timestamps",
+    "machine-readable-output",
+)
+
+MAX_UPDATE_BATCH = 5000
+
+DEFAULT_PORT = 1194
+DEFAULT_PROTO = "udp"
+
+AEAD_CIPHERS = ("AES-128-GCM", "AES-192-GCM", "AES-256-GCM", "CHACHA20-POLY1305")
+
+# Options ovpn-dco (OpenVPN 2.6 data channel offload) cannot handle
+DCO_INCOMPATIBLE_DIRECTIVES = (
+    "fragment",
+    "secret",
+    "shaper",
+    "http-proxy",
+    "socks-proxy",
+    "disable-dco",
+)
+
 # ==================================================
 # Helpers
 # ==================================================
@@ -93,21 +175,364 @@ def sanitize_ovpn(content: str) -> str:
         stripped = line.strip()
         if stripped.startswith(DISALLOWED_DIRECTIVES):
             continue
+        if stripped.startswith(MARKER_PREFIX):
+            continue
         cleaned.append(line)
     return "\n".join(cleaned) + "\n"
 
 
+def atomic_write(path: Path, content: str, mode: int):
+    """Write via temp file + rename so openvpn never reads a partial file."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def validate_resolved_remotes(resolved) -> dict:
+    """Return {hostname: [ip, ...]} or emit INVALID_RESOLVED_REMOTES."""
+    if resolved is None:
+        return {}
+    if not isinstance(resolved, dict):
+        emit_error("INVALID_RESOLVED_REMOTES")
+
+    clean = {}
+    for host, addresses in resolved.items():
+        if not isinstance(host, str) or not isinstance(addresses, list):
+            emit_error("INVALID_RESOLVED_REMOTES")
+        try:
+            clean[host] = [
+                str(ipaddress.ip_address(a)) for a in addresses[:MAX_RESOLVED_PER_HOST]
+            ]
+        except (TypeError, ValueError):
+            emit_error("INVALID_RESOLVED_REMOTES")
+    return clean
+
+
+def apply_resolved_remotes(content: str, resolved: dict) -> str:
+    """
+    Drop previously generated remote lines and, for every top-level
+    `remote <host>` with resolved addresses, insert `remote <ip>` lines
+    (same port/proto) in front of it.
+    """
+    out = []
+    skip_next = False
+    in_block = None
+
+    for line in content.splitlines():
+        stripped = line.strip()
+
+        if skip_next:
+            skip_next = False
+            if stripped.startswith("remote "):
+                continue
+        if stripped == RESOLVED_MARKER:
+            skip_next = True
+            continue
+
+        if in_block:
+            if stripped == f"</{in_block}>":
+                in_block = None
+        elif stripped.startswith("<") and stripped.endswith(">") and not stripped.startswith("</"):
+            in_block = stripped[1:-1]
+        else:
+            parts = stripped.split()
+            if len(parts) >= 2 and parts[0] == "remote" and parts[1] in resolved:
+                for address in resolved[parts[1]]:
+                    out.append(RESOLVED_MARKER)
+                    out.append(" ".join(["remote", address] + parts[2:]))
+
+        out.append(line)
+
+    return "\n".join(out) + "\n"
+
+
+@contextmanager
+def state_lock():
+    """Serialize helper invocations that modify shared state."""
+    base = Path(STATE_DIR)
+    base.mkdir(mode=0o700, parents=True, exist_ok=True)
+    with open(base / STATE_LOCK, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def store_blob(blob: str) -> Path:
+    """Store blob under its SHA-256 (once) and return its path."""
+    store = Path(STORE_DIR)
+    store.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    path = store / hashlib.sha256(blob.encode("utf-8")).hexdigest()
+    if not path.exists():
+        atomic_write(path, blob, 0o600)
+    return path
+
+
+def rereads_keys_unprivileged(content: str) -> bool:
+    """
+    True when openvpn drops privileges (user/group) without
+    persist-key: it would then re-read key files as that user on
+    SIGUSR1/ping-restart and fail on the root-only store.
+    """
+    directives = set()
+    block = None
+    for line in content.splitlines():
+        stripped = line.strip()
+        if block:
+            if stripped == f"</{block}>":
+                block = None
+        elif stripped.startswith("<") and stripped.endswith(">") and not stripped.startswith("</"):
+            block = stripped[1:-1]
+        elif stripped:
+            directives.add(stripped.split()[0])
+    return bool(directives & {"user", "group"}) and "persist-key" not in directives
+
+
+def extract_inline_blobs(content: str):
+    """
+    Move top-level inline certificate/key blocks into the store.
+
+    Returns the rewritten config, where e.g. <ca>...</ca> became
+    `ca /var/lib/openvpn-desk/store/<sha256>`, and the stored digests.
+    Configs that must re-read their keys unprivileged stay inline.
+    """
+    if rereads_keys_unprivileged(content):
+        return content, []
+
+    out = []
+    digests = []
+    block = None
+    block_lines = []
+
+    for line in content.splitlines():
+        stripped = line.strip()
+
+        if block:
+            if stripped == f"</{block}>":
+                if block in STORED_INLINE_TAGS:
+                    path = store_blob("\n".join(block_lines) + "\n")
+                    digests.append(path.name)
+                    out.append(f"{block} {path}")
+                else:
+                    out.extend(block_lines)
+                    out.append(line)
+                block = None
+                block_lines = []
+            elif block in STORED_INLINE_TAGS:
+                block_lines.append(stripped)
+            else:
+                block_lines.append(line)
+            continue
+
+        if stripped.startswith("<") and stripped.endswith(">") and not stripped.startswith("</"):
+            block = stripped[1:-1]
+            if block not in STORED_INLINE_TAGS:
+                out.append(line)
+            continue
+
+        out.append(line)
+
+    if block:
+        # Unterminated block: keep it verbatim, openvpn will report it
+        if block in STORED_INLINE_TAGS:
+            out.append(f"<{block}>")
+        out.extend(block_lines)
+
+    return "\n".join(out) + "\n", digests
+
+
+def load_store_refs() -> dict:
+    try:
+        with open(Path(STORE_DIR) / STORE_REFS, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def retain_blobs(wanted_by_name: dict):
+    """
+    Make each profile in wanted_by_name ({name: digests}) reference
+    exactly those digests, then delete every stored blob no profile
+    references, including blobs left behind by an interrupted write.
+    Call with state_lock() held; refs.json is written once.
+    """
+    refs = load_store_refs()
+
+    for digest in list(refs):
+        holders = [p for p in refs[digest] if p not in wanted_by_name]
+        holders.extend(n for n, digests in wanted_by_name.items() if digest in digests)
+        if holders:
+            refs[digest] = sorted(holders)
+        else:
+            del refs[digest]
+
+    for name, digests in wanted_by_name.items():
+        for digest in digests:
+            if name not in refs.setdefault(digest, []):
+                refs[digest] = sorted(refs[digest] + [name])
+
+    store = Path(STORE_DIR)
+    store.mkdir(mode=0o700, parents=True, exist_ok=True)
+    atomic_write(store / STORE_REFS, json.dumps(refs, sort_keys=True), 0o600)
+
+    # Blob names are SHA-256 hex digests; temp files start with "."
+    for path in store.iterdir():
+        if len(path.name) == 64 and path.name not in refs:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def render_auth(username: str, password: str) -> str:
+    return f"{username}\n{password}\n"
+
+
+def render_conf(content: str, auth_path: Path) -> str:
+    return f"{content}\nauth-user-pass {auth_path}\n"
+
+
+def validate_split_routes(routes):
+    """Return ip_network objects or emit INVALID_ROUTES."""
+    if routes is None:
+        return []
+    if not isinstance(routes, list) or len(routes) > MAX_SPLIT_ROUTES:
+        emit_error("INVALID_ROUTES")
+    try:
+        return [ipaddress.ip_network(r, strict=True) for r in routes]
+    except (TypeError, ValueError):
+        emit_error("INVALID_ROUTES")
+
+
+def render_split_tunnel(networks) -> str:
+    """The marked config block for networks ('' to disable)."""
+    if not networks:
+        return ""
+
+    lines = [
+        SPLIT_BEGIN,
+        "route-nopull",
+        # Without redirect-gateway openvpn adds no bypass for its own
+        # server; remote_host is the address it actually connected to
+        "route remote_host 255.255.255.255 net_gateway",
+    ]
+    for net in networks:
+        if net.version == 6 and net.prefixlen == 0:
+            # A /0 would clash with the default route; use the halves
+            lines.append("route-ipv6 ::/1")
+            lines.append("route-ipv6 8000::/1")
+        elif net.version == 6:
+            lines.append(f"route-ipv6 {net}")
+        elif net.prefixlen == 0:
+            lines.append("route 0.0.0.0 128.0.0.0")
+            lines.append("route 128.0.0.0 128.0.0.0")
+        else:
+            lines.append(f"route {net.network_address} {net.netmask}")
+    lines.append(SPLIT_END)
+    return "\n".join(lines) + "\n"
+
+
+def split_tunnel_block(content: str) -> str:
+    """The split-tunnel block currently in content, or ''."""
+    lines = content.splitlines()
+    try:
+        begin = lines.index(SPLIT_BEGIN)
+        end = lines.index(SPLIT_END, begin)
+    except ValueError:
+        return ""
+    return "\n".join(lines[begin:end + 1]) + "\n"
+
+
+def strip_split_tunnel(content: str) -> str:
+    block = split_tunnel_block(content)
+    return content.replace(block, "", 1) if block else content
+
+
 def write_auth_file(path: Path, username: str, password: str):
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(f"{username}\n{password}\n")
-    path.chmod(0o600)
+    atomic_write(path, render_auth(username, password), 0o600)
 
 
 def write_conf_file(path: Path, content: str, auth_path: Path):
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(content)
-        f.write(f"\nauth-user-pass {auth_path}\n")
-    path.chmod(0o644)
+    atomic_write(path, render_conf(content, auth_path), 0o644)
+
+
+def read_text(path: Path):
+    try:
+        return path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def connection_directives(content: str):
+    """
+    Directive lines that matter to an established tunnel, in order.
+    Comments, generated remote lines and logging-only directives are
+    left out, so changing e.g. `verb` does not force a restart.
+    """
+    directives = []
+    for line in apply_resolved_remotes(content, {}).splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith(("#", ";")):
+            continue
+        if stripped.split()[0] in NON_CONNECTION_DIRECTIVES:
+            continue
+        directives.append(" ".join(stripped.split()))
+    return directives
+
+
+def update_resolved_remotes(conf_path: Path, resolved: dict):
+    """
+    Rewrite the remote list of a profile, only if it changes. Runs
+    under the state lock so a concurrent update or split-tunnel change
+    of the same file is not overwritten with a stale copy.
+    """
+    with state_lock():
+        current = read_text(conf_path)
+        if current is None:
+            emit_error("PROFILE_NOT_FOUND")
+
+        updated = apply_resolved_remotes(current, resolved)
+        if updated != current:
+            atomic_write(conf_path, updated, 0o644)
+            sync_catalog(force=True)
+
+
+def unit_state(name: str) -> str:
+    result = subprocess.run(
+        ["systemctl", "is-active", f"openvpn@{name}"],
+        capture_output=True,
+        text=True
+    )
+    return result.stdout.strip()
+
+
+def wait_until_active(name: str, timeout: float) -> bool:
+    """
+    Poll the unit until it is active. openvpn@.service is Type=notify,
+    so "active" means the tunnel finished initialization.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = unit_state(name)
+        if state == "active":
+            return True
+        if state == "failed":
+            return False
+        time.sleep(SWITCH_POLL_INTERVAL)
+    return False
 
 
 def get_active_vpns():
@@ -127,12 +552,159 @@ def get_active_vpns():
     return active
 
 
+def parse_profile_metadata(content: str) -> dict:
+    """Summarize the connection settings of an installed config."""
+    remotes = []
+    proto = DEFAULT_PROTO
+    port = DEFAULT_PORT
+    cipher = None
+    data_ciphers = None
+    dco = True
+    in_block = None
+    split_routes = None
+
+    for line in apply_resolved_remotes(content, {}).splitlines():
+        stripped = line.strip()
+        if in_block:
+            if stripped == f"</{in_block}>":
+                in_block = None
+            continue
+        if stripped.startswith("<") and stripped.endswith(">") and not stripped.startswith("</"):
+            in_block = stripped[1:-1]
+            continue
+        if stripped == SPLIT_BEGIN:
+            split_routes = 0
+        if not stripped or stripped.startswith(("#", ";")):
+            continue
+
+        parts = stripped.split()
+        key, args = parts[0], parts[1:]
+
+        if split_routes is not None and key in ("route", "route-ipv6"):
+            if args[:1] != ["remote_host"]:  # the server bypass
+                split_routes += 1
+
+        if key == "remote" and args:
+            remotes.append([
+                args[0],
+                int(args[1]) if len(args) > 1 and args[1].isdigit() else None,
+                args[2] if len(args) > 2 else None,
+            ])
+        elif key == "proto" and args:
+            proto = args[0]
+        elif key in ("port", "rport") and args and args[0].isdigit():
+            port = int(args[0])
+        elif key == "cipher" and args:
+            cipher = args[0]
+        elif key in ("data-ciphers", "ncp-ciphers") and args:
+            data_ciphers = args[0]
+        elif key in DCO_INCOMPATIBLE_DIRECTIVES:
+            dco = False
+        elif key in ("dev", "dev-type") and args and args[0].startswith("tap"):
+            dco = False
+        elif key == "comp-lzo" and args != ["no"]:
+            dco = False
+        elif key == "compress" and args and args[0] not in ("migrate", "stub", "stub-v2"):
+            dco = False
+
+    if data_ciphers and not any(
+        c.upper() in AEAD_CIPHERS for c in data_ciphers.split(":")
+    ):
+        dco = False
+
+    # Per-remote port/proto fall back to the global ones
+    for remote in remotes:
+        remote[1] = remote[1] or port
+        remote[2] = remote[2] or proto
+
+    return {
+        "remotes": remotes,
+        "proto": proto,
+        "port": port,
+        "cipher": data_ciphers or cipher,
+        "dco_compatible": dco,
+        "split_routes": split_routes,
+    }
+
+
+def load_catalog() -> dict:
+    try:
+        with open(Path(STATE_DIR) / CATALOG_FILE, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        catalog = {}
+    if catalog.get("version") != CATALOG_VERSION:
+        # Re-parse everything, but remember when profiles were installed
+        catalog = {
+            "version": CATALOG_VERSION,
+            "dir_mtime_ns": None,
+            "profiles": {
+                name: {"installed_at": entry.get("installed_at"), "mtime_ns": None, "size": None}
+                for name, entry in (catalog.get("profiles") or {}).items()
+            },
+        }
+    return catalog
+
+
+def sync_catalog(force: bool = False) -> dict:
+    """
+    Return the catalog, bringing it up to date first if needed.
+
+    When the profile directory's mtime matches the recorded one (no
+    profile was added, removed or replaced) this is a single file
+    read. Otherwise every config is stat()ed and only those whose
+    mtime or size changed are read and parsed again.
+    """
+    catalog = load_catalog()
+    base = Path(OPENVPN_DIR)
+    dir_mtime = base.stat().st_mtime_ns
+
+    if not force and catalog["dir_mtime_ns"] == dir_mtime:
+        return catalog
+
+    old = catalog["profiles"]
+    profiles = {}
+    for conf in base.glob("*.conf"):
+        st = conf.stat()
+        entry = old.get(conf.stem)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            profiles[conf.stem] = entry
+            continue
+
+        content = conf.read_bytes().decode("utf-8", errors="replace")
+        entry = parse_profile_metadata(content)
+        entry.update({
+            # Identifies the configuration, so generated remote lines
+            # (rewritten on every connect) are left out of the hash
+            "sha256": hashlib.sha256(
+                apply_resolved_remotes(content, {}).encode("utf-8")
+            ).hexdigest(),
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "installed_at": (old.get(conf.stem) or {}).get("installed_at") or st.st_mtime,
+        })
+        profiles[conf.stem] = entry
+
+    catalog["profiles"] = profiles
+    catalog["dir_mtime_ns"] = dir_mtime
+
+    state = Path(STATE_DIR)
+    state.mkdir(mode=0o700, parents=True, exist_ok=True)
+    atomic_write(state / CATALOG_FILE, json.dumps(catalog, sort_keys=True), 0o600)
+    return catalog
+
+
 # ==================================================
 # Action Handlers
 # ==================================================
 
 def handle_list_profiles():
-    profiles = sorted(p.stem for p in Path(OPENVPN_DIR).glob("*.conf"))
+    with state_lock():
+        catalog = sync_catalog()
+    profiles = [
+        dict(entry, name=name)
+        for name, entry in sorted(catalog["profiles"].items())
+    ]
     emit_ok({"profiles": profiles})
 
 
@@ -155,8 +727,12 @@ def handle_install_profile(data):
 
     sanitized = sanitize_ovpn(ovpn)
 
-    write_auth_file(auth_path, username, password)
-    write_conf_file(conf_path, sanitized, auth_path)
+    with state_lock():
+        compact, digests = extract_inline_blobs(sanitized)
+        write_auth_file(auth_path, username, password)
+        write_conf_file(conf_path, compact, auth_path)
+        retain_blobs({name: digests})
+        sync_catalog(force=True)
 
     systemctl(["daemon-reload"])
     systemctl(["enable", f"openvpn@{name}"])
@@ -164,6 +740,89 @@ def handle_install_profile(data):
     emit_ok()
 
 
+def update_one_profile(item, active, retained: dict):
+    """
+    Bring one installed profile in line with item. Files are only
+    rewritten when their content differs; the unit is restarted only
+    when it is active and a connection-affecting directive changed.
+    Stored blobs of a rewritten config are recorded in retained.
+    """
+    name = item["profile_name"]
+    result = {
+        "profile_name": name,
+        "changed": False,
+        "auth_changed": False,
+        "restarted": False,
+    }
+
+    conf_path, auth_path = profile_paths(name)
+    current_conf = read_text(conf_path)
+    if current_conf is None:
+        result["error"] = "PROFILE_NOT_FOUND"
+        return result
+
+    ovpn = item.get("ovpn_content")
+    username = item.get("username")
+    password = item.get("password")
+    if not ovpn or bool(username) != bool(password):
+        result["error"] = "MISSING_FIELDS"
+        return result
+
+    compact, digests = extract_inline_blobs(sanitize_ovpn(ovpn))
+    new_conf = render_conf(compact, auth_path) + split_tunnel_block(current_conf)
+
+    if username:
+        new_auth = render_auth(username, password)
+        if read_text(auth_path) != new_auth:
+            # Picked up on the next (re)connect; no restart needed
+            atomic_write(auth_path, new_auth, 0o600)
+            result["auth_changed"] = True
+
+    # Pre-resolved remote lines are regenerated on connect, ignore them
+    if apply_resolved_remotes(current_conf, {}) != new_conf:
+        atomic_write(conf_path, new_conf, 0o644)
+        retained[name] = digests
+        result["changed"] = True
+
+        if name in active and (
+            connection_directives(current_conf) != connection_directives(new_conf)
+        ):
+            systemctl(["restart", f"openvpn@{name}"])
+            result["restarted"] = True
+
+    return result
+
+
+def handle_update_profile(data):
+    items = data.get("profiles")
+    if items is None:
+        items = [data]
+    if not isinstance(items, list) or not items or len(items) > MAX_UPDATE_BATCH:
+        emit_error("MISSING_FIELDS")
+
+    for item in items:
+        if not isinstance(item, dict):
+            emit_error("MISSING_FIELDS")
+        validate_profile_name(item.get("profile_name"))
+
+    active = get_active_vpns()
+
+    with state_lock():
+        retained = {}
+        try:
+            results = [update_one_profile(item, active, retained) for item in items]
+        finally:
+            # One refs.json rewrite for the whole batch
+            if retained:
+                retain_blobs(retained)
+                sync_catalog(force=True)
+
+    emit_ok({
+        "results": results,
+        "changed": sum(1 for r in results if r["changed"] or r["auth_changed"]),
+    })
+
+
 def handle_connect(data):
     name = data.get("profile_name")
     validate_profile_name(name)
@@ -176,6 +835,10 @@ def handle_connect(data):
     if active and name not in active:
         emit_error("ANOTHER_VPN_ACTIVE", "Another VPN is already active")
 
+    resolved = validate_resolved_remotes(data.get("resolved_remotes"))
+    if name not in active:
+        update_resolved_remotes(conf_path, resolved)
+
     systemctl(["start", f"openvpn@{name}"])
     emit_ok()
 
@@ -192,13 +855,7 @@ def handle_status(data):
     name = data.get("profile_name")
     validate_profile_name(name)
 
-    result = subprocess.run(
-        ["systemctl", "is-active", f"openvpn@{name}"],
-        capture_output=True,
-        text=True
-    )
-
-    state = result.stdout.strip()
+    state = unit_state(name)
 
     emit_ok({
         "active": state == "active",
@@ -206,6 +863,115 @@ def handle_status(data):
     })
 
 
+def handle_switch(data):
+    name = data.get("profile_name")
+    validate_profile_name(name)
+
+    conf_path, _ = profile_paths(name)
+    if not conf_path.exists():
+        emit_error("PROFILE_NOT_FOUND")
+
+    timeout = data.get("timeout", SWITCH_TIMEOUT)
+    if not isinstance(timeout, (int, float)) or not 0 < timeout <= SWITCH_TIMEOUT_MAX:
+        emit_error("INVALID_TIMEOUT")
+
+    resolved = validate_resolved_remotes(data.get("resolved_remotes"))
+
+    active = get_active_vpns()
+    if name in active:
+        emit_ok({"previous": None, "switch_ms": 0, "downtime_ms": 0})
+
+    previous = active[0] if active else None
+    started = time.monotonic()
+
+    # Everything that can be prepared happens before the old tunnel goes down
+    update_resolved_remotes(conf_path, resolved)
+
+    down = time.monotonic()
+    reason = f"{name} did not come up within {timeout}s"
+    try:
+        for other in active:
+            systemctl(["stop", f"openvpn@{other}"])
+
+        systemctl(["start", "--no-block", f"openvpn@{name}"])
+        up = wait_until_active(name, timeout)
+    except subprocess.CalledProcessError:
+        # e.g. a masked or broken unit; restore the previous tunnel below
+        up = False
+        reason = f"systemctl could not switch to {name}"
+
+    if up:
+        done = time.monotonic()
+        emit_ok({
+            "previous": previous,
+            "switch_ms": round((done - started) * 1000),
+            "downtime_ms": round((done - down) * 1000),
+        })
+
+    # Roll back to the profile that was active before
+    subprocess.run(
+        ["systemctl", "stop", f"openvpn@{name}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    if previous:
+        try:
+            systemctl(["start", f"openvpn@{previous}"])
+        except subprocess.CalledProcessError:
+            emit_error("SWITCH_FAILED", f"{reason}, and restoring {previous} failed")
+        emit_error("SWITCH_FAILED", f"{reason}, restored {previous}")
+    emit_error("SWITCH_FAILED", reason)
+
+
+def handle_set_split_tunnel(data):
+    name = data.get("profile_name")
+    validate_profile_name(name)
+
+    networks = validate_split_routes(data.get("routes"))
+
+    conf_path, _ = profile_paths(name)
+
+    with state_lock():
+        current = read_text(conf_path)
+        if current is None:
+            emit_error("PROFILE_NOT_FOUND")
+
+        updated = strip_split_tunnel(current) + render_split_tunnel(networks)
+        changed = updated != current
+        if changed:
+            atomic_write(conf_path, updated, 0o644)
+            sync_catalog(force=True)
+
+    restarted = False
+    if changed and unit_state(name) == "active":
+        systemctl(["restart", f"openvpn@{name}"])
+        restarted = True
+
+    emit_ok({"changed": changed, "restarted": restarted, "routes": len(networks)})
+
+
+def handle_remove_profile(data):
+    name = data.get("profile_name")
+    validate_profile_name(name)
+
+    conf_path, auth_path = profile_paths(name)
+    if not conf_path.exists():
+        emit_error("PROFILE_NOT_FOUND")
+
+    if unit_state(name) == "active":
+        systemctl(["stop", f"openvpn@{name}"])
+    systemctl(["disable", f"openvpn@{name}"])
+
+    with state_lock():
+        conf_path.unlink()
+        if auth_path.exists():
+            auth_path.unlink()
+        retain_blobs({name: []})
+        sync_catalog(force=True)
+
+    emit_ok()
+
+
 # ==================================================
 # Dispatcher
 # ==================================================
@@ -225,6 +991,14 @@ def main():
             handle_disconnect(data)
         elif action == "status":
             handle_status(data)
+        elif action == "switch":
+            handle_switch(data)
+        elif action == "update_profile":
+            handle_update_profile(data)
+        elif action == "set_split_tunnel":
+            handle_set_split_tunnel(data)
+        elif action == "remove_profile":
+            handle_remove_profile(data)
         else:
             emit_error("UNKNOWN_ACTION")
 
@@ -1,12 +1,27 @@
 #!/usr/bin/env python3
+import asyncio
 import os
 import sys
+import time
 import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import Gtk, GLib, Gdk
 
 
 from openvpndesk.backend import VpnBackend, VpnBackendError
+from openvpndesk.benchview import BenchmarkWindow
+from openvpndesk.logview import LogWindow
+from openvpndesk.resolver import ResolverCache, is_ip_literal
+from openvpndesk.routes import (
+    ALL_ADDRESSES,
+    compute_routes,
+    load_split_settings,
+    parse_networks,
+    save_split_settings,
+)
+from openvpndesk.stallmon import StallMonitor, stall_monitoring_enabled
+
+# How often cached remote addresses are checked for upcoming expiry
 
 class YangzLinuxVpnClient(Gtk.Window):
 
@@ -22,11 +37,14 @@ class YangzLinuxVpnClient(Gtk.Window):
 
         self.load_css()
         self.set_border_width(12)
-        self.set_default_size(360, 580)
+        self.set_default_size(560, 580)
 
         self.backend = VpnBackend()
+        self.resolver = ResolverCache()
         self.selected_profile = None
         self.active_profile = None
+        self.profile_details = {}
+        self.resolver_timer_id = None
 
 
         self._build_ui()
@@ -38,6 +56,7 @@ class YangzLinuxVpnClient(Gtk.Window):
 
 
 
+
     # --------------------------------------------------
     # UI Construction
     # --------------------------------------------------
@@ -61,12 +80,20 @@ class YangzLinuxVpnClient(Gtk.Window):
         title.set_xalign(0)
 
         header.pack_start(title, True, True, 0)
+
+        self.logs_btn = self.create_icon_button(
+            "text-x-generic-symbolic", " Logs"
+        )
+        self.logs_btn.connect("clicked", self.on_logs_clicked)
+        header.pack_end(self.logs_btn, False, False, 0)
+
         vbox.pack_start(header, False, False, 0)
 
 
         # Profile list
-        # Columns: profile_name, status ("active"/"inactive")
-        self.liststore = Gtk.ListStore(str, str)
+        # Columns: profile_name, status ("active"/"inactive"),
+        # server, proto/port, cipher, dco, size (bytes), installed_at
+        self.liststore = Gtk.ListStore(str, str, str, str, str, str, int, float)
         self.treeview = Gtk.TreeView(model=self.liststore)
 
         # renderer = Gtk.CellRendererText()
@@ -87,11 +114,38 @@ class YangzLinuxVpnClient(Gtk.Window):
         # Profile name column
         name_renderer = Gtk.CellRendererText()
         name_column = Gtk.TreeViewColumn("VPN Profiles", name_renderer, text=0)
+        name_column.set_sort_column_id(0)
         self.treeview.append_column(name_column)
 
+        # Catalog metadata columns (sortable)
+        for title, index in (
+            ("Server", 2),
+            ("Proto", 3),
+            ("Cipher", 4),
+            ("DCO", 5),
+        ):
+            renderer = Gtk.CellRendererText()
+            column = Gtk.TreeViewColumn(title, renderer, text=index)
+            column.set_sort_column_id(index)
+            column.set_resizable(True)
+            self.treeview.append_column(column)
+
+        size_renderer = Gtk.CellRendererText()
+        size_column = Gtk.TreeViewColumn("Size", size_renderer)
+        size_column.set_cell_data_func(size_renderer, self.render_size)
+        size_column.set_sort_column_id(6)
+        self.treeview.append_column(size_column)
+
+        installed_renderer = Gtk.CellRendererText()
+        installed_column = Gtk.TreeViewColumn("Installed", installed_renderer)
+        installed_column.set_cell_data_func(installed_renderer, self.render_installed)
+        installed_column.set_sort_column_id(7)
+        self.treeview.append_column(installed_column)
+
 
         selection = self.treeview.get_selection()
         selection.connect("changed", self.on_profile_selected)
+        self.treeview.connect("button-press-event", self.on_profile_button_press)
 
         scrolled = Gtk.ScrolledWindow()
         scrolled.set_vexpand(True)
@@ -110,9 +164,17 @@ class YangzLinuxVpnClient(Gtk.Window):
         self.speed_label.set_visible(False)
         vbox.pack_start(self.speed_label, False, False, 0)
 
+        # Tunnel quality label
+        self.quality_label = Gtk.Label(label="")
+        self.quality_label.set_xalign(0)
+        self.quality_label.set_visible(False)
+        self.quality_label.set_no_show_all(True)
+        vbox.pack_start(self.quality_label, False, False, 0)
+
         # label Styles
         self.status_label.get_style_context().add_class("status-label")
         self.speed_label.get_style_context().add_class("speed-label")
+        self.quality_label.get_style_context().add_class("quality-label")
 
         # Buttons row
         button_box = Gtk.Box(spacing=6)
@@ -129,6 +191,10 @@ class YangzLinuxVpnClient(Gtk.Window):
             "network-offline-symbolic", " Disconnect"
         )
 
+        self.switch_btn = self.create_icon_button(
+            "media-playlist-shuffle-symbolic", " Switch"
+        )
+
         self.refresh_btn = self.create_icon_button(
             "view-refresh-symbolic", " Refresh"
         )   
@@ -143,16 +209,19 @@ class YangzLinuxVpnClient(Gtk.Window):
         # button styles
         self.connect_btn.get_style_context().add_class("connect")
         self.disconnect_btn.get_style_context().add_class("disconnect")
+        self.switch_btn.get_style_context().add_class("switch")
 
         self.import_btn.connect("clicked", self.on_import_clicked)
         self.connect_btn.connect("clicked", self.on_connect_clicked)
         self.disconnect_btn.connect("clicked", self.on_disconnect_clicked)
+        self.switch_btn.connect("clicked", self.on_switch_clicked)
         self.refresh_btn.connect("clicked", self.on_refresh_clicked)
 
 
         button_box.pack_start(self.import_btn, True, True, 0)
         button_box.pack_start(self.connect_btn, True, True, 0)
         button_box.pack_start(self.disconnect_btn, True, True, 0)
+        button_box.pack_start(self.switch_btn, True, True, 0)
         button_box.pack_start(self.refresh_btn, True, True, 0)
 
 
@@ -202,10 +271,52 @@ class YangzLinuxVpnClient(Gtk.Window):
                 "<span foreground='#9ca3af' size='large'>●</span>"
             )
 
+    def render_size(self, column, cell, model, iter, data=None):
+        size = model.get_value(iter, 6)
+        if size >= 1024:
+            cell.set_property("text", f"{size / 1024:.1f} KB")
+        else:
+            cell.set_property("text", f"{size} B" if size else "")
+
+    def render_installed(self, column, cell, model, iter, data=None):
+        installed = model.get_value(iter, 7)
+        cell.set_property(
+            "text",
+            time.strftime("%Y-%m-%d", time.localtime(installed)) if installed else ""
+        )
+
+    def profile_row(self, profile):
+        remotes = profile.get("remotes") or []
+        server = remotes[0][0] if remotes else ""
+        if len(remotes) > 1:
+            server += f" (+{len(remotes) - 1})"
+
+        proto = profile.get("proto", "")
+        if proto and profile.get("port"):
+            proto = f"{proto}/{profile['port']}"
+
+        dco = profile.get("dco_compatible")
+        return [
+            profile["name"],
+            "inactive",
+            server,
+            proto,
+            profile.get("cipher") or "",
+            "" if dco is None else ("yes" if dco else "no"),
+            profile.get("size", 0),
+            float(profile.get("installed_at") or 0),
+        ]
+
+    def profile_remotes(self, name):
+        return self.profile_details.get(name, {}).get("remotes") or []
+
     def _update_buttons(self):
+        self.logs_btn.set_sensitive(bool(self.selected_profile))
+
         if not self.selected_profile:
             self.connect_btn.set_sensitive(False)
             self.disconnect_btn.set_sensitive(False)
+            self.switch_btn.set_sensitive(False)
             return
 
         try:
@@ -213,17 +324,33 @@ class YangzLinuxVpnClient(Gtk.Window):
         except VpnBackendError:
             self.connect_btn.set_sensitive(False)
             self.disconnect_btn.set_sensitive(False)
+            self.switch_btn.set_sensitive(False)
             return
 
         if status.get("active"):
             self.connect_btn.set_sensitive(False)
             self.disconnect_btn.set_sensitive(True)
+            self.switch_btn.set_sensitive(False)
             self.status_label.set_text("Status: Connected to " + self.selected_profile)
         else:
             self.connect_btn.set_sensitive(True) 
             self.disconnect_btn.set_sensitive(False)
+            self.switch_btn.set_sensitive(True)
             self.status_label.set_text("Status: Disconnected")
 
+    def confirm(self, title: str, message: str) -> bool:
+        dialog = Gtk.MessageDialog(
+            transient_for=self,
+            flags=0,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.YES_NO,
+            text=title,
+        )
+        dialog.format_secondary_text(message)
+        response = dialog.run()
+        dialog.destroy()
+        return response == Gtk.ResponseType.YES
+
     def show_error(self, title: str, message: str):
         dialog = Gtk.MessageDialog(
             transient_for=self,
@@ -361,7 +488,38 @@ class YangzLinuxVpnClient(Gtk.Window):
             )
             self.refresh_profiles()
         except VpnBackendError as e:
-            self.show_error("Import Failed", e.message)
+            if e.code != "PROFILE_EXISTS":
+                self.show_error("Import Failed", e.message)
+                return
+            if self.confirm(
+                "Profile Already Exists",
+                f"Update '{alias}' with the selected file and credentials? "
+                "Only changed files are written."
+            ):
+                self.update_existing_profile(alias, ovpn_content, username, password)
+
+    def update_existing_profile(self, alias, ovpn_content, username, password):
+        try:
+            result = self.backend.update_profile(
+                profile_name=alias,
+                ovpn_content=ovpn_content,
+                username=username,
+                password=password
+            )
+        except VpnBackendError as e:
+            self.show_error("Update Failed", e.message)
+            return
+
+        if not result["changed"] and not result["auth_changed"]:
+            self.status_label.set_text(f"Status: {alias} is already up to date")
+            return
+
+        # New server/cipher columns, config hash and remotes for the resolver
+        self.refresh_profiles()
+        if result["restarted"]:
+            self.status_label.set_text(f"Status: {alias} updated and reconnected")
+        else:
+            self.status_label.set_text(f"Status: {alias} updated")
     
     def read_iface_bytes(self, iface):
         try:
@@ -395,8 +553,29 @@ class YangzLinuxVpnClient(Gtk.Window):
 
         self.last_rx = rx
         self.last_tx = tx
+
+        self.update_quality()
         return True
 
+    def update_quality(self):
+        quality = self.backend.get_quality()
+        if not quality or not quality["probes"]:
+            self.quality_label.set_visible(False)
+            return
+
+        if quality["p50_ms"] is None:
+            self.quality_label.set_text(
+                f"RTT: no replies   loss {quality['loss_pct']:.1f}%"
+            )
+        else:
+            jitter = quality["jitter_ms"] or 0.0
+            self.quality_label.set_text(
+                f"RTT p50 {quality['p50_ms']:.0f} / p95 {quality['p95_ms']:.0f} / "
+                f"p99 {quality['p99_ms']:.0f} ms   jitter {jitter:.1f} ms   "
+                f"loss {quality['loss_pct']:.1f}%"
+            )
+        self.quality_label.set_visible(True)
+
 
     # --------------------------------------------------
     # Backend Actions
@@ -412,11 +591,34 @@ class YangzLinuxVpnClient(Gtk.Window):
             profiles = self.backend.list_profiles()
             for p in profiles:
                 # Default to inactive
-                self.liststore.append([p, "inactive"])
+                self.liststore.append(self.profile_row(p))
+            self.profile_details = {p["name"]: p for p in profiles}
         except VpnBackendError as e:
             self.show_error("Error", e.message)
 
         self._update_buttons()
+        self.refresh_resolver()
+
+    def refresh_resolver(self):
+        hosts = [
+            host
+            for profile in self.profile_details.values()
+            for host, _, _ in profile.get("remotes") or []
+        ]
+        # Only entries missing or close to expiry are actually resolved
+        self.resolver.refresh_in_background(hosts)
+
+        # Next check when the first entry becomes due, not on a fixed period
+        if self.resolver_timer_id is not None:
+            GLib.source_remove(self.resolver_timer_id)
+        self.resolver_timer_id = GLib.timeout_add(
+            int(self.resolver.next_check_delay(hosts) * 1000), self._on_resolver_timer
+        )
+
+    def _on_resolver_timer(self):
+        self.resolver_timer_id = None
+        self.refresh_resolver()
+        return False
 
 
     def refresh_status(self):
@@ -445,6 +647,8 @@ class YangzLinuxVpnClient(Gtk.Window):
                 self.status_label.set_text(f"Status: Disconnected ({self.active_profile})")
 
                 self.vpn_iface = None
+                self.backend.stop_quality_monitor()
+                self.quality_label.set_visible(False)
                 self.speed_label.set_visible(False)
                 if self.speed_timer_id is not None:
                     GLib.source_remove(self.speed_timer_id)
@@ -469,6 +673,7 @@ class YangzLinuxVpnClient(Gtk.Window):
             self.vpn_iface = iface
             self.last_rx = None
             self.last_tx = None
+            self.backend.start_quality_monitor(iface)
             return False  # stop retrying
         return True  # retry again in 1 second
 
@@ -492,19 +697,57 @@ class YangzLinuxVpnClient(Gtk.Window):
         if not self.selected_profile:
             return
 
+        remotes = self.profile_remotes(self.selected_profile)
+
         try:
-            self.backend.connect(self.selected_profile)
+            self.backend.connect(
+                self.selected_profile,
+                resolved_remotes=self.resolver.overrides_for(remotes)
+            )
             self.refresh_status()
             self._update_buttons()
         except VpnBackendError as e:
             self.show_error("Connection Failed", e.message)
 
+    def on_switch_clicked(self, button):
+        if not self.selected_profile:
+            return
+
+        remotes = self.profile_remotes(self.selected_profile)
+
+        # The window describes the previous tunnel, even when the new
+        # one happens to use the same gateway address
+        self.backend.stop_quality_monitor()
+        self.quality_label.set_visible(False)
+
+        try:
+            result = self.backend.switch(
+                self.selected_profile,
+                resolved_remotes=self.resolver.overrides_for(remotes)
+            )
+        except VpnBackendError as e:
+            self.show_error("Switch Failed", e.message)
+            self.refresh_status()
+            self._update_buttons()
+            return
+
+        self.refresh_status()
+        self._update_buttons()
+
+        if result["previous"]:
+            self.status_label.set_text(
+                f"Status: Switched {result['previous']} → {self.selected_profile} "
+                f"in {result['switch_ms'] / 1000:.2f}s"
+            )
+
     def on_disconnect_clicked(self, button):
         if not self.selected_profile:
             return
 
         try:
             self.backend.disconnect(self.selected_profile)
+            self.backend.stop_quality_monitor()
+            self.quality_label.set_visible(False)
             self.refresh_profiles()
         except VpnBackendError as e:
             self.show_error("Disconnection Failed", e.message)
@@ -512,6 +755,211 @@ class YangzLinuxVpnClient(Gtk.Window):
     def on_refresh_clicked(self, button):
         self.refresh_profiles()
 
+    def on_profile_button_press(self, treeview, event):
+        if event.type != Gdk.EventType.BUTTON_PRESS or event.button != 3:
+            return False
+
+        hit = treeview.get_path_at_pos(int(event.x), int(event.y))
+        if not hit:
+            return False
+        treeview.get_selection().select_path(hit[0])
+
+        menu = Gtk.Menu()
+        bench_item = Gtk.MenuItem(label="Benchmark…")
+        bench_item.connect("activate", self.on_benchmark_activate)
+        menu.append(bench_item)
+
+        split_item = Gtk.MenuItem(label="Split Tunnel…")
+        split_item.connect("activate", self.on_split_tunnel_activate)
+        menu.append(split_item)
+
+        remove_item = Gtk.MenuItem(label="Remove Profile…")
+        remove_item.connect("activate", self.on_remove_activate)
+        menu.append(remove_item)
+        menu.show_all()
+        menu.popup_at_pointer(event)
+        return True
+
+    def on_benchmark_activate(self, item):
+        if not self.selected_profile:
+            return
+
+        name = self.selected_profile
+        BenchmarkWindow(
+            self,
+            name,
+            self.profile_details.get(name, {}).get("sha256")
+        ).show_all()
+
+    def on_split_tunnel_activate(self, item):
+        if not self.selected_profile:
+            return
+
+        name = self.selected_profile
+        settings = load_split_settings(name)
+        response, include_text, exclude_text = self.prompt_split_tunnel(
+            name, "\n".join(settings["include"]), "\n".join(settings["exclude"])
+        )
+        if response == Gtk.ResponseType.CANCEL:
+            return
+
+        include, bad_include = parse_networks(include_text.splitlines())
+        exclude, bad_exclude = parse_networks(exclude_text.splitlines())
+        if bad_include or bad_exclude:
+            self.show_error(
+                "Invalid Network",
+                "Not a valid CIDR: " + ", ".join((bad_include + bad_exclude)[:5])
+            )
+            return
+
+        routes = []
+        if response == Gtk.ResponseType.APPLY and (include or exclude):
+            if not include:
+                include = list(ALL_ADDRESSES)
+
+            # The helper keeps the IPv4 server address off the tunnel
+            # (route remote_host ... net_gateway). OpenVPN has no such
+            # keyword for IPv6, so IPv6 server addresses are excluded here.
+            if any(net.version == 6 for net in compute_routes(include, exclude)):
+                server_v6, unresolved = self.server_ipv6_networks(name)
+                if unresolved:
+                    self.show_error(
+                        "Split Tunnel Failed",
+                        "Cannot resolve the VPN server " + ", ".join(unresolved) +
+                        ";\nits IPv6 addresses must stay outside the tunnel."
+                    )
+                    return
+                exclude.extend(server_v6)
+
+            routes = [str(net) for net in compute_routes(include, exclude)]
+
+        try:
+            result = self.backend.set_split_tunnel(name, routes)
+        except VpnBackendError as e:
+            self.show_error("Split Tunnel Failed", e.message)
+            return
+
+        save_split_settings(
+            name,
+            [line.strip() for line in include_text.splitlines() if line.strip()],
+            [line.strip() for line in exclude_text.splitlines() if line.strip()],
+        )
+
+        if result["routes"]:
+            self.status_label.set_text(
+                f"Status: {name} split tunnel, {result['routes']} routes"
+            )
+        else:
+            self.status_label.set_text(f"Status: {name} uses server routes")
+        self.refresh_profiles()
+
+    def server_ipv6_networks(self, name):
+        """
+        IPv6 addresses of the profile's remotes as /128 networks, plus
+        the hostnames that could not be resolved. Hosts missing from
+        the resolver cache are resolved now.
+        """
+        hosts = [host for host, _, _ in self.profile_remotes(name)]
+        missing = [h for h in hosts if not is_ip_literal(h) and not self.resolver.lookup(h)]
+        if missing:
+            asyncio.run(self.resolver.refresh(missing))
+
+        networks = []
+        unresolved = []
+        for host in dict.fromkeys(hosts):
+            addresses = [host] if is_ip_literal(host) else self.resolver.lookup(host)
+            if not addresses:
+                unresolved.append(host)
+            networks.extend(n for n in parse_networks(addresses)[0] if n.version == 6)
+        return networks, unresolved
+
+    def prompt_split_tunnel(self, name, include_text, exclude_text):
+        dialog = Gtk.Dialog(
+            title=f"Split Tunnel - {name}",
+            parent=self,
+            flags=Gtk.DialogFlags.MODAL
+        )
+        dialog.get_style_context().add_class("openvpn-dialog")
+        dialog.set_default_size(420, 420)
+
+        dialog.add_buttons(
+            Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL,
+            "Use Server Routes", Gtk.ResponseType.REJECT,
+            Gtk.STOCK_APPLY, Gtk.ResponseType.APPLY
+        )
+
+        content = dialog.get_content_area()
+        content.get_style_context().add_class("openvpn-dialog-content")
+
+        grid = Gtk.Grid(column_spacing=10, row_spacing=10, margin=10)
+        content.add(grid)
+
+        hint = Gtk.Label(
+            label="One CIDR per line. Only included networks use the VPN;\n"
+                  "leave Include empty to send everything except Exclude.",
+            xalign=0
+        )
+        hint.get_style_context().add_class("dim-label")
+        grid.attach(hint, 0, 0, 1, 1)
+
+        views = []
+        for row, (title, text) in enumerate(
+            (("Include:", include_text), ("Exclude:", exclude_text))
+        ):
+            label = Gtk.Label(label=title, xalign=0)
+            view = Gtk.TextView()
+            view.set_monospace(True)
+            view.get_buffer().set_text(text)
+
+            scrolled = Gtk.ScrolledWindow()
+            scrolled.set_hexpand(True)
+            scrolled.set_vexpand(True)
+            scrolled.add(view)
+
+            grid.attach(label, 0, 1 + row * 2, 1, 1)
+            grid.attach(scrolled, 0, 2 + row * 2, 1, 1)
+            views.append(view)
+
+        dialog.show_all()
+        response = dialog.run()
+
+        texts = []
+        for view in views:
+            buffer = view.get_buffer()
+            texts.append(buffer.get_text(
+                buffer.get_start_iter(), buffer.get_end_iter(), False
+            ))
+
+        dialog.destroy()
+
+        if response not in (Gtk.ResponseType.APPLY, Gtk.ResponseType.REJECT):
+            response = Gtk.ResponseType.CANCEL
+        return response, texts[0], texts[1]
+
+    def on_remove_activate(self, item):
+        if not self.selected_profile:
+            return
+
+        name = self.selected_profile
+        if not self.confirm(
+            "Remove VPN Profile",
+            f"Remove '{name}' and its stored credentials? "
+            "An active connection will be stopped."
+        ):
+            return
+
+        try:
+            self.backend.remove_profile(name)
+            self.refresh_profiles()
+        except VpnBackendError as e:
+            self.show_error("Remove Failed", e.message)
+
+    def on_logs_clicked(self, button):
+        if not self.selected_profile:
+            return
+
+        LogWindow(self, self.selected_profile).show_all()
+
 class OpenVPNDeskApp(Gtk.Application):
     def __init__(self):
         super().__init__(application_id="in.openvpndesk.app")
@@ -528,8 +976,18 @@ class OpenVPNDeskApp(Gtk.Application):
 
 def main():
     app = OpenVPNDeskApp()
+
+    monitor = None
+    if stall_monitoring_enabled():
+        monitor = StallMonitor()
+        monitor.start()
+
     app.run()
 
+    if monitor:
+        monitor.stop()
+        sys.stderr.write(monitor.report())
+
 
 if __name__ == "__main__":
     main()
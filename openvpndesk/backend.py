@@ -7,7 +7,9 @@ if BASE_DIR not in sys.path:
 
 import json
 import subprocess
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from openvpndesk.quality import create_prober
 
 
 HELPER_PATH = "/usr/lib/openvpn-desk/helper.py"
@@ -29,6 +31,9 @@ class VpnBackend:
     privileged helper via pkexec + JSON.
     """
 
+    def __init__(self):
+        self._prober = None
+
     def _call_helper(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """
         Call the privileged helper and return parsed JSON.
@@ -74,11 +79,20 @@ class VpnBackend:
     # Public API (used by GTK)
     # -------------------------------------------------
 
-    def list_profiles(self) -> List[str]:
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """
+        Installed profiles with catalog metadata: name, remotes,
+        proto, port, cipher, dco_compatible, sha256, size and
+        installed_at.
+        """
         resp = self._call_helper({
             "action": "list_profiles"
         })
-        return resp.get("profiles", [])
+        return [
+            # Older helpers return bare names
+            {"name": p} if isinstance(p, str) else p
+            for p in resp.get("profiles", [])
+        ]
 
     def install_profile(
         self,
@@ -95,12 +109,104 @@ class VpnBackend:
             "password": password
         })
 
-    def connect(self, profile_name: str) -> None:
+    def update_profiles(self, profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Update many installed profiles in one helper call.
+
+        Each item holds profile_name, ovpn_content and optionally
+        username/password. Returns one result per item with
+        changed / auth_changed / restarted flags (and error, if any).
+        """
+        resp = self._call_helper({
+            "action": "update_profile",
+            "profiles": profiles
+        })
+        return resp.get("results", [])
+
+    def update_profile(
+        self,
+        profile_name: str,
+        ovpn_content: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None
+    ) -> Dict[str, Any]:
+        item = {
+            "profile_name": profile_name,
+            "ovpn_content": ovpn_content
+        }
+        if username and password:
+            item["username"] = username
+            item["password"] = password
+
+        result = self.update_profiles([item])[0]
+        if result.get("error"):
+            raise VpnBackendError(result["error"], result["error"].replace("_", " ").title())
+        return result
+
+    def set_split_tunnel(
+        self,
+        profile_name: str,
+        routes: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Route only `routes` (CIDRs) through the tunnel, ignoring pushed
+        routes; None or [] restores the server's routing.
+        """
+        resp = self._call_helper({
+            "action": "set_split_tunnel",
+            "profile_name": profile_name,
+            "routes": routes or []
+        })
+        return {
+            "changed": resp.get("changed", False),
+            "restarted": resp.get("restarted", False),
+            "routes": resp.get("routes", 0)
+        }
+
+    def remove_profile(self, profile_name: str) -> None:
         self._call_helper({
-            "action": "connect",
+            "action": "remove_profile",
             "profile_name": profile_name
         })
 
+    def connect(
+        self,
+        profile_name: str,
+        resolved_remotes: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        self._call_helper({
+            "action": "connect",
+            "profile_name": profile_name,
+            "resolved_remotes": resolved_remotes or {}
+        })
+
+    def switch(
+        self,
+        profile_name: str,
+        resolved_remotes: Optional[Dict[str, List[str]]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Stop the active VPN and start profile_name in one helper call.
+
+        Returns the previous profile and the measured switch/downtime
+        in milliseconds. The helper rolls back on failure.
+        """
+        payload = {
+            "action": "switch",
+            "profile_name": profile_name,
+            "resolved_remotes": resolved_remotes or {}
+        }
+        if timeout is not None:
+            payload["timeout"] = timeout
+
+        resp = self._call_helper(payload)
+        return {
+            "previous": resp.get("previous"),
+            "switch_ms": resp.get("switch_ms", 0),
+            "downtime_ms": resp.get("downtime_ms", 0)
+        }
+
     def disconnect(self, profile_name: str) -> None:
         self._call_helper({
             "action": "disconnect",
@@ -116,3 +222,40 @@ class VpnBackend:
             "active": resp.get("active", False),
             "state": resp.get("state", "unknown")
         }
+
+    # -------------------------------------------------
+    # Tunnel quality (unprivileged, runs in-process)
+    # -------------------------------------------------
+
+    def start_quality_monitor(self, iface: str) -> bool:
+        """
+        Start probing through iface; False if no target is known.
+        A monitor already probing the same target keeps its window.
+        """
+        prober = create_prober(iface)
+        if prober is not None and self._prober is not None and (
+            (prober.target, prober.mode, prober.port)
+            == (self._prober.target, self._prober.mode, self._prober.port)
+        ):
+            return True
+
+        self.stop_quality_monitor()
+        self._prober = prober
+        if self._prober is None:
+            return False
+        self._prober.start()
+        return True
+
+    def stop_quality_monitor(self) -> None:
+        if self._prober is not None:
+            self._prober.stop()
+            self._prober = None
+
+    def get_quality(self) -> Optional[Dict[str, Any]]:
+        """
+        RTT percentiles, jitter and loss over the sliding window,
+        or None while no monitor is running.
+        """
+        if self._prober is None:
+            return None
+        return self._prober.window.snapshot()
@@ -0,0 +1,177 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib
+
+from openvpndesk.tunnelbench import (
+    DEFAULT_SECONDS,
+    format_value,
+    is_storable,
+    load_results,
+    load_settings,
+    openvpn_pid,
+    parse_endpoint,
+    run_benchmark,
+    save_result,
+    save_settings,
+    summarize_by_config,
+)
+
+
+class BenchmarkWindow(Gtk.Window):
+    """
+    Runs the tunnel benchmark for one profile and shows its history,
+    grouped by config hash (medians) with the individual runs below.
+    """
+
+    def __init__(self, parent: Gtk.Window, profile_name: str,
+                 config_sha256: Optional[str]):
+        super().__init__(title=f"Benchmark - {profile_name}")
+        self.set_transient_for(parent)
+        self.set_default_size(760, 420)
+        self.set_border_width(8)
+        self.get_style_context().add_class("openvpn-desk-window")
+
+        self.profile_name = profile_name
+        self.config_sha256 = config_sha256
+
+        self._build_ui()
+        self.reload()
+
+    def _build_ui(self):
+        vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        self.add(vbox)
+
+        controls = Gtk.Box(spacing=6)
+
+        self.server_entry = Gtk.Entry()
+        self.server_entry.set_placeholder_text("benchmark server HOST[:PORT]")
+        self.server_entry.set_text(load_settings().get("server", ""))
+
+        self.seconds_spin = Gtk.SpinButton.new_with_range(2, 60, 1)
+        self.seconds_spin.set_value(DEFAULT_SECONDS)
+
+        self.run_btn = Gtk.Button(label="Run")
+        self.run_btn.get_style_context().add_class("suggested-action")
+        self.run_btn.connect("clicked", self.on_run_clicked)
+
+        controls.pack_start(Gtk.Label(label="Server:"), False, False, 0)
+        controls.pack_start(self.server_entry, True, True, 0)
+        controls.pack_start(Gtk.Label(label="Seconds:"), False, False, 0)
+        controls.pack_start(self.seconds_spin, False, False, 0)
+        controls.pack_start(self.run_btn, False, False, 0)
+        vbox.pack_start(controls, False, False, 0)
+
+        self.status_label = Gtk.Label(label="")
+        self.status_label.set_xalign(0)
+        vbox.pack_start(self.status_label, False, False, 0)
+
+        # Columns: config / run time, runs, tcp up, tcp down, retrans up,
+        # retrans down, udp, udp loss, openvpn cpu
+        self.store = Gtk.TreeStore(str, str, str, str, str, str, str, str, str)
+        self.treeview = Gtk.TreeView(model=self.store)
+        for index, title in enumerate((
+            "Config / Run",
+            "Runs",
+            "TCP ↑ Mbps",
+            "TCP ↓ Mbps",
+            "Retrans ↑",
+            "Retrans ↓",
+            "UDP Mbps",
+            "Loss %",
+            "CPU %",
+        )):
+            renderer = Gtk.CellRendererText()
+            column = Gtk.TreeViewColumn(title, renderer, text=index)
+            column.set_resizable(True)
+            self.treeview.append_column(column)
+
+        scrolled = Gtk.ScrolledWindow()
+        scrolled.set_vexpand(True)
+        scrolled.add(self.treeview)
+        vbox.pack_start(scrolled, True, True, 0)
+
+    def _metrics(self, row: Dict[str, Any]):
+        return [
+            format_value(row.get("tcp_upload_mbps"), ".1f"),
+            format_value(row.get("tcp_download_mbps"), ".1f"),
+            format_value(row.get("tcp_upload_retransmits"), ".0f"),
+            format_value(row.get("tcp_download_retransmits"), ".0f"),
+            format_value(row.get("udp_mbps"), ".1f"),
+            format_value(row.get("udp_loss_pct"), ".2f"),
+            format_value(row.get("openvpn_cpu_pct"), ".0f"),
+        ]
+
+    def reload(self):
+        self.store.clear()
+        results = load_results(self.profile_name)
+
+        for summary in reversed(summarize_by_config(results)):
+            config = summary["config_sha256"]
+            label = config[:10]
+            if config == self.config_sha256:
+                label += " (current)"
+            parent = self.store.append(
+                None, [label, str(summary["runs"])] + self._metrics(summary)
+            )
+
+            runs = [r for r in results if (r.get("config_sha256") or "unknown") == config]
+            for run in sorted(runs, key=lambda r: r.get("time", 0), reverse=True):
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(run.get("time", 0)))
+                self.store.append(parent, [stamp, ""] + self._metrics(run))
+
+        # Newest configuration first, with its runs expanded
+        if len(self.store):
+            self.treeview.expand_row(Gtk.TreePath.new_first(), False)
+
+    def on_run_clicked(self, button):
+        # Checked on every click: the profile may have been disconnected
+        # or switched away from since the window was opened
+        if openvpn_pid(self.profile_name) is None:
+            self.status_label.set_text("Connect this profile to run a benchmark.")
+            return
+
+        server = self.server_entry.get_text().strip()
+        if not server:
+            self.status_label.set_text("Enter the address of a benchmark server.")
+            return
+
+        settings = load_settings()
+        save_settings(dict(settings, server=server))
+
+        seconds = self.seconds_spin.get_value()
+        self.run_btn.set_sensitive(False)
+        self.status_label.set_text(f"Running for about {seconds * 3:.0f} seconds…")
+
+        def worker():
+            try:
+                result = run_benchmark(
+                    self.profile_name,
+                    parse_endpoint(server),
+                    seconds=seconds,
+                    config_sha256=self.config_sha256,
+                )
+                error = None
+            except (OSError, ValueError) as e:
+                result, error = None, str(e)
+            GLib.idle_add(self._on_finished, result, error)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_finished(self, result, error):
+        self.run_btn.set_sensitive(True)
+        if error:
+            self.status_label.set_text(f"Benchmark failed: {error}")
+            return False
+
+        if is_storable(result):
+            save_result(result)
+        self.status_label.set_text(
+            f"TCP ↑ {result['tcp_upload_mbps']:.1f} / ↓ {result['tcp_download_mbps']:.1f} Mbps, "
+            f"UDP {result['udp_mbps']:.1f} Mbps ({result['udp_loss_pct']:.2f}% loss)"
+        )
+        self.reload()
+        return False
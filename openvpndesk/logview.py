@@ -0,0 +1,527 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import re
+import subprocess
+import threading
+import time
+from collections import deque, namedtuple
+from typing import Deque, Dict, List, Optional
+
+import gi
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gtk, GLib, Pango
+
+
+LogEntry = namedtuple("LogEntry", ["timestamp", "priority", "message"])
+
+# syslog priorities as used by journald
+PRIORITY_NAMES = {
+    0: "emerg",
+    1: "alert",
+    2: "crit",
+    3: "err",
+    4: "warning",
+    5: "notice",
+    6: "info",
+    7: "debug",
+}
+
+# (label, lowest priority shown) for the severity filter
+SEVERITY_FILTERS = (
+    ("All", 7),
+    ("Info", 6),
+    ("Notice", 5),
+    ("Warning", 4),
+    ("Error", 3),
+)
+
+DEFAULT_PRIORITY = 6
+RING_CAPACITY = 5000
+JOURNAL_BACKLOG = 1000
+
+# Upper bound of entries moved from a source into the view per tick,
+# so a large backlog is painted in slices instead of one long stall.
+DRAIN_BATCH = 200
+DRAIN_INTERVAL_MS = 150
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Everything GtkTextBuffer treats as a line break
+LINE_BREAK_RE = re.compile("\r\n|[\r\n\u2028\u2029]")
+
+
+def tokenize(text: str) -> List[str]:
+    return list(dict.fromkeys(t.lower() for t in TOKEN_RE.findall(text)))
+
+
+# --------------------------------------------------
+# Bounded log ring with a word index
+# --------------------------------------------------
+
+class LogRing:
+    """
+    Fixed-capacity store of log entries.
+
+    Every entry gets a monotonically increasing sequence number.
+    An inverted word index (token -> ascending sequence numbers) is
+    maintained alongside, so searching never rescans the whole ring.
+    Evicting an entry removes it from the index as well, keeping
+    memory flat however long the log runs.
+    """
+
+    def __init__(self, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self._entries: Deque = deque()
+        self._index: Dict[str, Deque[int]] = {}
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def first_seq(self) -> int:
+        return self._next_seq - len(self._entries)
+
+    def append(self, entry: LogEntry) -> List[int]:
+        """Store entry and return the sequence numbers it evicted."""
+        seq = self._next_seq
+        self._next_seq += 1
+
+        tokens = tokenize(entry.message)
+        self._entries.append((seq, entry, tokens))
+        for token in tokens:
+            self._index.setdefault(token, deque()).append(seq)
+
+        evicted = []
+        while len(self._entries) > self.capacity:
+            old_seq, _, old_tokens = self._entries.popleft()
+            for token in old_tokens:
+                postings = self._index[token]
+                # The oldest entry is always at the head of its postings
+                postings.popleft()
+                if not postings:
+                    del self._index[token]
+            evicted.append(old_seq)
+        return evicted
+
+    def get(self, seq: int) -> Optional[LogEntry]:
+        pos = seq - self.first_seq
+        if pos < 0 or pos >= len(self._entries):
+            return None
+        return self._entries[pos][1]
+
+    def items(self, max_priority: int = 7):
+        for seq, entry, _ in self._entries:
+            if entry.priority <= max_priority:
+                yield seq, entry
+
+    def search(self, query: str, max_priority: int = 7) -> List[int]:
+        """
+        Return sequence numbers of entries containing every word
+        of query, oldest first.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        postings = []
+        for word in words:
+            found = self._index.get(word)
+            if not found:
+                return []
+            postings.append(found)
+
+        postings.sort(key=len)
+        candidates = postings[0]
+        others = [set(p) for p in postings[1:]]
+
+        result = []
+        for seq in candidates:
+            if all(seq in other for other in others):
+                entry = self.get(seq)
+                if entry is not None and entry.priority <= max_priority:
+                    result.append(seq)
+        return result
+
+
+# --------------------------------------------------
+# Log sources
+# --------------------------------------------------
+
+class _ThreadedSource(ABC):
+    """
+    Base class for log sources.
+
+    Sources read on a worker thread and hand entries over through a
+    bounded deque (append/popleft are thread-safe); the GTK side drains
+    it from the main loop. If the view falls behind, the oldest pending
+    entries are dropped, exactly as the ring would evict them anyway.
+    """
+
+    def __init__(self, pending: int = RING_CAPACITY):
+        self.entries: Deque[LogEntry] = deque(maxlen=pending)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @abstractmethod
+    def _run(self):
+        """Read until self._stop is set, appending to self.entries."""
+
+
+def parse_journal_line(line: str) -> Optional[LogEntry]:
+    """Parse one line of `journalctl -o json` output."""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+    message = record.get("MESSAGE", "")
+    if isinstance(message, list):
+        # Non-UTF-8 messages are exported as byte arrays
+        message = bytes(message).decode("utf-8", errors="replace")
+
+    try:
+        timestamp = int(record.get("__REALTIME_TIMESTAMP", 0)) / 1_000_000
+    except (TypeError, ValueError):
+        timestamp = time.time()
+
+    try:
+        priority = int(record.get("PRIORITY", DEFAULT_PRIORITY))
+    except (TypeError, ValueError):
+        priority = DEFAULT_PRIORITY
+
+    return LogEntry(timestamp, priority, str(message))
+
+
+class JournalSource(_ThreadedSource):
+    """Follow the journal of a systemd unit via journalctl."""
+
+    def __init__(self, unit: str, backlog: int = JOURNAL_BACKLOG, command=None):
+        super().__init__()
+        self.command = command or [
+            "journalctl", "-u", unit, "-f", "-o", "json",
+            "-n", str(backlog), "--no-pager",
+        ]
+        self._proc = None
+        # Orders process creation against stop(), so a window closed
+        # right after opening cannot leave journalctl running
+        self._proc_lock = threading.Lock()
+
+    def _run(self):
+        with self._proc_lock:
+            if self._stop.is_set():
+                return
+            try:
+                self._proc = subprocess.Popen(
+                    self.command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    errors="replace",
+                )
+            except FileNotFoundError:
+                self.entries.append(LogEntry(time.time(), 3, "journalctl not found"))
+                return
+            proc = self._proc
+
+        # journalctl explains missing permissions (not in the
+        # systemd-journal/adm groups) on stderr; show that in the pane
+        threading.Thread(target=self._read_stderr, args=(proc.stderr,), daemon=True).start()
+
+        try:
+            for line in proc.stdout:
+                if self._stop.is_set():
+                    break
+                entry = parse_journal_line(line)
+                if entry is not None:
+                    self.entries.append(entry)
+        finally:
+            if proc.poll() is None:
+                proc.terminate()
+            proc.wait()
+
+    def _read_stderr(self, stream):
+        for line in stream:
+            line = line.strip()
+            if line:
+                self.entries.append(LogEntry(time.time(), 4, f"journalctl: {line}"))
+
+    def stop(self):
+        super().stop()
+        with self._proc_lock:
+            proc = self._proc
+        if proc and proc.poll() is None:
+            # The reader thread sees EOF and reaps the process
+            proc.terminate()
+
+
+class FileSource(_ThreadedSource):
+    """
+    Follow a plain text (or journal JSON) file, like `tail -f`.
+
+    Useful as a stand-in for the journal and for configs that use
+    `log`/`log-append`.
+    """
+
+    def __init__(self, path: str, backlog: int = JOURNAL_BACKLOG, poll_interval: float = 0.5):
+        super().__init__()
+        self.path = path
+        self.backlog = backlog
+        self.poll_interval = poll_interval
+
+    def _parse(self, line: str) -> LogEntry:
+        if line.startswith("{"):
+            entry = parse_journal_line(line)
+            if entry is not None:
+                return entry
+        return LogEntry(time.time(), DEFAULT_PRIORITY, line)
+
+    def _run(self):
+        try:
+            f = open(self.path, "r", encoding="utf-8", errors="replace")
+        except OSError as e:
+            self.entries.append(LogEntry(time.time(), 3, f"Cannot open {self.path}: {e}"))
+            return
+
+        with f:
+            # Only the tail of an existing file is kept in memory
+            for line in deque(f, maxlen=self.backlog):
+                self.entries.append(self._parse(line.rstrip("\n")))
+
+            partial = ""
+            while not self._stop.is_set():
+                chunk = f.readline()
+                if not chunk:
+                    try:
+                        if f.tell() > os.stat(self.path).st_size:
+                            f.seek(0)  # truncated / rotated in place
+                    except OSError:
+                        pass
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                partial += chunk
+                if partial.endswith("\n"):
+                    self.entries.append(self._parse(partial.rstrip("\n")))
+                    partial = ""
+
+
+# --------------------------------------------------
+# GTK log pane
+# --------------------------------------------------
+
+class LogPane(Gtk.Box):
+    """
+    Streams a log source into a Gtk.TextBuffer.
+
+    The buffer mirrors the visible (severity-filtered) part of a
+    LogRing: new entries are appended, evicted ones are deleted from
+    the top, so the widget never grows past the ring capacity.
+    """
+
+    def __init__(self, source: _ThreadedSource, capacity: int = RING_CAPACITY):
+        super().__init__(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+
+        self.source = source
+        self.ring = LogRing(capacity)
+        self.max_priority = 7
+
+        # Buffer line of each visible entry, as an ordinal since the
+        # last rebuild; line = ordinal - lines already deleted.
+        self._ordinal: Dict[int, int] = {}
+        self._appended = 0
+        self._deleted = 0
+
+        self._matches: List[int] = []
+        self._match_pos = -1
+
+        self._build_ui()
+
+        self.source.start()
+        self._drain_id = GLib.timeout_add(DRAIN_INTERVAL_MS, self._drain)
+        self.connect("destroy", self.on_destroy)
+
+    def _build_ui(self):
+        toolbar = Gtk.Box(spacing=6)
+
+        self.severity_combo = Gtk.ComboBoxText()
+        for label, _ in SEVERITY_FILTERS:
+            self.severity_combo.append_text(label)
+        self.severity_combo.set_active(0)
+        self.severity_combo.connect("changed", self.on_severity_changed)
+
+        self.search_entry = Gtk.SearchEntry()
+        self.search_entry.set_placeholder_text("Search words")
+        self.search_entry.connect("search-changed", self.on_search_changed)
+        self.search_entry.connect("activate", self.on_search_next)
+
+        self.match_label = Gtk.Label(label="")
+
+        toolbar.pack_start(self.severity_combo, False, False, 0)
+        toolbar.pack_start(self.search_entry, True, True, 0)
+        toolbar.pack_start(self.match_label, False, False, 0)
+        self.pack_start(toolbar, False, False, 0)
+
+        self.buffer = Gtk.TextBuffer()
+        self.match_tag = self.buffer.create_tag("match", background="#fde68a")
+        self.error_tag = self.buffer.create_tag("error", foreground="#dc2626")
+        self.warning_tag = self.buffer.create_tag("warning", foreground="#b45309")
+
+        self.textview = Gtk.TextView(buffer=self.buffer)
+        self.textview.set_editable(False)
+        self.textview.set_cursor_visible(False)
+        self.textview.set_monospace(True)
+        self.textview.set_wrap_mode(Pango.WrapMode.WORD_CHAR)
+
+        self.scrolled = Gtk.ScrolledWindow()
+        self.scrolled.set_vexpand(True)
+        self.scrolled.add(self.textview)
+        self.pack_start(self.scrolled, True, True, 0)
+
+    # --------------------------------------------------
+    # Buffer maintenance
+    # --------------------------------------------------
+
+    def _format(self, entry: LogEntry) -> str:
+        stamp = time.strftime("%b %d %H:%M:%S", time.localtime(entry.timestamp))
+        # Exactly one buffer line per entry, which eviction and search rely on
+        message = LINE_BREAK_RE.sub(" ⏎ ", entry.message.rstrip("\r\n"))
+        return f"{stamp}  {message}\n"
+
+    def _append_line(self, seq: int, entry: LogEntry):
+        end = self.buffer.get_end_iter()
+        text = self._format(entry)
+        if entry.priority <= 3:
+            self.buffer.insert_with_tags(end, text, self.error_tag)
+        elif entry.priority == 4:
+            self.buffer.insert_with_tags(end, text, self.warning_tag)
+        else:
+            self.buffer.insert(end, text)
+        self._ordinal[seq] = self._appended
+        self._appended += 1
+
+    def _delete_line(self, seq: int):
+        if self._ordinal.pop(seq, None) is None:
+            return
+        start = self.buffer.get_start_iter()
+        end = self.buffer.get_iter_at_line(1)
+        self.buffer.delete(start, end)
+        self._deleted += 1
+
+    def _rebuild(self):
+        self.buffer.set_text("")
+        self._ordinal.clear()
+        self._appended = 0
+        self._deleted = 0
+        for seq, entry in self.ring.items(self.max_priority):
+            self._append_line(seq, entry)
+        self._apply_search()
+
+    def _at_bottom(self) -> bool:
+        adj = self.scrolled.get_vadjustment()
+        return adj.get_value() >= adj.get_upper() - adj.get_page_size() - 1
+
+    def _drain(self):
+        follow = self._at_bottom()
+        added = False
+
+        for _ in range(DRAIN_BATCH):
+            try:
+                entry = self.source.entries.popleft()
+            except IndexError:
+                break
+
+            for old_seq in self.ring.append(entry):
+                self._delete_line(old_seq)
+
+            seq = self.ring.first_seq + len(self.ring) - 1
+            if entry.priority <= self.max_priority:
+                self._append_line(seq, entry)
+                added = True
+
+        if added:
+            if self.search_entry.get_text():
+                self._apply_search()
+            if follow:
+                self.textview.scroll_to_iter(self.buffer.get_end_iter(), 0, False, 0, 1)
+        return True
+
+    # --------------------------------------------------
+    # Search
+    # --------------------------------------------------
+
+    def _line_of(self, seq: int) -> Optional[int]:
+        ordinal = self._ordinal.get(seq)
+        if ordinal is None:
+            return None
+        return ordinal - self._deleted
+
+    def _apply_search(self):
+        self.buffer.remove_tag(
+            self.match_tag,
+            self.buffer.get_start_iter(),
+            self.buffer.get_end_iter(),
+        )
+
+        query = self.search_entry.get_text()
+        self._matches = self.ring.search(query, self.max_priority) if query else []
+        if self._match_pos >= len(self._matches):
+            self._match_pos = -1
+
+        for seq in self._matches:
+            line = self._line_of(seq)
+            if line is None:
+                continue
+            start = self.buffer.get_iter_at_line(line)
+            end = start.copy()
+            end.forward_to_line_end()
+            self.buffer.apply_tag(self.match_tag, start, end)
+
+        self.match_label.set_text(
+            f"{len(self._matches)} matches" if query else ""
+        )
+
+    def on_search_changed(self, entry):
+        self._match_pos = -1
+        self._apply_search()
+
+    def on_search_next(self, entry):
+        if not self._matches:
+            return
+        self._match_pos = (self._match_pos + 1) % len(self._matches)
+        line = self._line_of(self._matches[self._match_pos])
+        if line is not None:
+            it = self.buffer.get_iter_at_line(line)
+            self.textview.scroll_to_iter(it, 0.1, True, 0, 0.5)
+
+    def on_severity_changed(self, combo):
+        self.max_priority = SEVERITY_FILTERS[combo.get_active()][1]
+        self._rebuild()
+
+    def on_destroy(self, widget):
+        if self._drain_id is not None:
+            GLib.source_remove(self._drain_id)
+            self._drain_id = None
+        self.source.stop()
+
+
+class LogWindow(Gtk.Window):
+    """Top-level window showing the journal of one profile's unit."""
+
+    def __init__(self, parent: Gtk.Window, profile_name: str, source=None):
+        super().__init__(title=f"Logs - {profile_name}")
+        self.set_transient_for(parent)
+        self.set_default_size(720, 480)
+        self.set_border_width(8)
+        self.get_style_context().add_class("openvpn-desk-window")
+
+        source = source or JournalSource(f"openvpn@{profile_name}")
+        self.add(LogPane(source))
@@ -0,0 +1,34 @@
+import os
+from pathlib import Path
+
+
+APP_DIR_NAME = "openvpn-desk"
+
+
+def _xdg_dir(env_var: str, fallback: str) -> Path:
+    base = os.environ.get(env_var) or os.path.join(Path.home(), fallback)
+    return Path(base) / APP_DIR_NAME
+
+
+def user_cache_dir() -> Path:
+    """Per-user cache directory ($XDG_CACHE_HOME/openvpn-desk)."""
+    return _xdg_dir("XDG_CACHE_HOME", ".cache")
+
+
+def user_config_dir() -> Path:
+    """Per-user config directory ($XDG_CONFIG_HOME/openvpn-desk)."""
+    return _xdg_dir("XDG_CONFIG_HOME", ".config")
+
+
+def user_data_dir() -> Path:
+    """Per-user data directory ($XDG_DATA_HOME/openvpn-desk)."""
+    return _xdg_dir("XDG_DATA_HOME", os.path.join(".local", "share"))
+
+
+def write_text_atomic(path: Path, text: str):
+    """Replace path with text without ever exposing a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
@@ -0,0 +1,372 @@
+"""
+Tunnel quality monitor.
+
+A low-rate prober sends small timestamped probes through the tunnel
+(ICMP echo to the pushed gateway by default, or UDP to an echo
+service) and keeps RTT, jitter and loss over a sliding window in
+constant memory.
+"""
+
+import heapq
+import json
+import math
+import random
+import select
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from openvpndesk.paths import user_config_dir
+
+
+SETTINGS_FILE = "quality.json"
+
+PROBE_INTERVAL = 1.0
+PROBE_TIMEOUT = 1.0
+WINDOW_SIZE = 120  # probes, i.e. two minutes at the default rate
+
+HIST_MIN_MS = 0.1
+HIST_MAX_MS = 10_000.0
+HIST_BUCKETS_PER_DECADE = 20
+
+UDP_MAGIC = b"ODQP"
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+ICMP6_ECHO_REQUEST = 128
+ICMP6_ECHO_REPLY = 129
+
+
+# --------------------------------------------------
+# Statistics
+# --------------------------------------------------
+
+class LogHistogram:
+    """
+    Fixed-bucket log-scale histogram of milliseconds.
+
+    Buckets span HIST_MIN_MS..HIST_MAX_MS with a constant number per
+    decade (about 12% wide each at 20/decade); values outside are
+    clamped into the first/last bucket. Values can be removed again,
+    which is what makes sliding windows cheap.
+    """
+
+    def __init__(self, min_ms: float = HIST_MIN_MS, max_ms: float = HIST_MAX_MS,
+                 per_decade: int = HIST_BUCKETS_PER_DECADE):
+        self.min_ms = min_ms
+        self.per_decade = per_decade
+        self.size = int(math.ceil(math.log10(max_ms / min_ms) * per_decade)) + 1
+        self.counts = [0] * self.size
+        self.total = 0
+
+    def bucket(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        index = int(math.log10(value_ms / self.min_ms) * self.per_decade)
+        return min(index, self.size - 1)
+
+    def bucket_upper(self, index: int) -> float:
+        return self.min_ms * 10 ** ((index + 1) / self.per_decade)
+
+    def add(self, value_ms: float):
+        self.counts[self.bucket(value_ms)] += 1
+        self.total += 1
+
+    def remove(self, value_ms: float):
+        self.counts[self.bucket(value_ms)] -= 1
+        self.total -= 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th value."""
+        if not self.total:
+            return None
+        rank = max(1, math.ceil(q * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bucket_upper(index)
+        return self.bucket_upper(self.size - 1)
+
+
+class QualityWindow:
+    """
+    Sliding window over the last `size` probes.
+
+    Each slot holds the probe's RTT (None when lost) and its absolute
+    RTT difference to the previous answered probe. Sums are maintained
+    incrementally, so memory and per-probe cost stay constant.
+    """
+
+    def __init__(self, size: int = WINDOW_SIZE):
+        self.size = size
+        self.slots: List[Optional[Tuple[Optional[float], Optional[float]]]] = [None] * size
+        self.pos = 0
+        self.count = 0
+        self.lost = 0
+        self.diff_sum = 0.0
+        self.diff_count = 0
+        self.last_rtt = None
+        self.smoothed_jitter = 0.0
+        self.histogram = LogHistogram()
+        self._lock = threading.Lock()
+
+    def record(self, rtt_ms: Optional[float]):
+        with self._lock:
+            old = self.slots[self.pos]
+            if old is not None:
+                old_rtt, old_diff = old
+                if old_rtt is None:
+                    self.lost -= 1
+                else:
+                    self.histogram.remove(old_rtt)
+                if old_diff is not None:
+                    self.diff_sum -= old_diff
+                    self.diff_count -= 1
+                self.count -= 1
+
+            diff = None
+            if rtt_ms is None:
+                self.lost += 1
+            else:
+                self.histogram.add(rtt_ms)
+                if self.last_rtt is not None:
+                    diff = abs(rtt_ms - self.last_rtt)
+                    self.diff_sum += diff
+                    self.diff_count += 1
+                    # RFC 3550 style smoothed jitter
+                    self.smoothed_jitter += (diff - self.smoothed_jitter) / 16
+                self.last_rtt = rtt_ms
+
+            self.slots[self.pos] = (rtt_ms, diff)
+            self.pos = (self.pos + 1) % self.size
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "probes": self.count,
+                "lost": self.lost,
+                "loss_pct": 100.0 * self.lost / self.count if self.count else 0.0,
+                "p50_ms": self.histogram.quantile(0.50),
+                "p95_ms": self.histogram.quantile(0.95),
+                "p99_ms": self.histogram.quantile(0.99),
+                "jitter_ms": self.diff_sum / self.diff_count if self.diff_count else None,
+                "smoothed_jitter_ms": self.smoothed_jitter if self.diff_count else None,
+            }
+
+
+# --------------------------------------------------
+# Target discovery
+# --------------------------------------------------
+
+def tunnel_gateway(iface: str, route_file: str = "/proc/net/route") -> Optional[str]:
+    """Return the IPv4 gateway of the first route through iface."""
+    try:
+        with open(route_file, "r", encoding="utf-8") as f:
+            next(f, None)
+            for line in f:
+                fields = line.split()
+                if len(fields) < 3 or fields[0] != iface:
+                    continue
+                gateway = int(fields[2], 16)
+                if gateway:
+                    return socket.inet_ntoa(struct.pack("<I", gateway))
+    except OSError:
+        pass
+    return None
+
+
+def load_settings() -> Dict[str, Any]:
+    """
+    Optional overrides from $XDG_CONFIG_HOME/openvpn-desk/quality.json,
+    e.g. {"target": "10.8.0.1", "mode": "udp", "port": 7}.
+    """
+    try:
+        with open(user_config_dir() / SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+# --------------------------------------------------
+# Prober
+# --------------------------------------------------
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+class QualityProber:
+    """
+    Sends one probe every `interval` seconds and records the outcome.
+
+    mode "icmp" uses unprivileged ICMP echo sockets (allowed by the
+    default net.ipv4.ping_group_range on current distributions);
+    mode "udp" expects an echo service at (target, port).
+    """
+
+    def __init__(self, target: str, mode: str = "icmp", port: int = 7,
+                 interval: float = PROBE_INTERVAL, timeout: float = PROBE_TIMEOUT,
+                 window: Optional[QualityWindow] = None):
+        self.target = target
+        self.mode = mode
+        self.port = port
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window or QualityWindow()
+        self._stop = threading.Event()
+        self._thread = None
+        self._seq = 0
+        self._ident = random.randrange(0x10000)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _open_socket(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.target else socket.AF_INET
+        if self.mode == "udp":
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+        else:
+            proto = socket.IPPROTO_ICMPV6 if family == socket.AF_INET6 else socket.IPPROTO_ICMP
+            sock = socket.socket(family, socket.SOCK_DGRAM, proto)
+        sock.setblocking(False)
+        return sock
+
+    def _packet(self, seq: int, sent_ns: int) -> bytes:
+        payload = struct.pack("!HQ", seq, sent_ns)
+        if self.mode == "udp":
+            return UDP_MAGIC + payload
+        icmp_type = ICMP6_ECHO_REQUEST if ":" in self.target else ICMP_ECHO_REQUEST
+        header = struct.pack("!BBHHH", icmp_type, 0, 0, self._ident, seq)
+        return struct.pack("!BBHHH", icmp_type, 0, _checksum(header + payload),
+                           self._ident, seq) + payload
+
+    def _reply_seq(self, data: bytes) -> Optional[int]:
+        if self.mode == "udp":
+            if data[:4] != UDP_MAGIC or len(data) < 14:
+                return None
+            return struct.unpack("!H", data[4:6])[0]
+        if len(data) < 8 or data[0] not in (ICMP_ECHO_REPLY, ICMP6_ECHO_REPLY):
+            return None
+        return struct.unpack("!H", data[6:8])[0]
+
+    def probe_once(self, sock: socket.socket) -> Optional[float]:
+        """Send one probe and wait for its echo; RTT in ms or None."""
+        self._seq = (self._seq + 1) & 0xFFFF
+        seq = self._seq
+        sent = time.monotonic_ns()
+        port = self.port if self.mode == "udp" else 0
+
+        try:
+            sock.sendto(self._packet(seq, sent), (self.target, port))
+        except OSError:
+            return None
+
+        deadline = sent + int(self.timeout * 1e9)
+        while True:
+            remaining = (deadline - time.monotonic_ns()) / 1e9
+            if remaining <= 0:
+                return None
+            ready, _, _ = select.select([sock], [], [], remaining)
+            if not ready:
+                return None
+            try:
+                data = sock.recv(2048)
+            except OSError:
+                return None
+            if self._reply_seq(data) == seq:
+                return (time.monotonic_ns() - sent) / 1e6
+            # Late reply to an earlier probe: already counted as lost
+
+    def _run(self):
+        try:
+            sock = self._open_socket()
+        except OSError:
+            return
+
+        with sock:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self.window.record(self.probe_once(sock))
+                self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+# --------------------------------------------------
+# Local stand-in
+# --------------------------------------------------
+
+class UdpEchoServer:
+    """
+    Minimal UDP echo service with injectable delay and loss, to stand
+    in for a remote echo target when developing or testing.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 delay: float = 0.0, loss: float = 0.0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.address = self.sock.getsockname()
+        self.delay = delay
+        self.loss = loss
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.sock.close()
+
+    def _run(self):
+        pending = []  # heap of (due, seq, data, addr)
+        counter = 0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            while pending and pending[0][0] <= now:
+                _, _, data, addr = heapq.heappop(pending)
+                self.sock.sendto(data, addr)
+
+            wait = 0.05
+            if pending:
+                wait = min(wait, max(0.0, pending[0][0] - now))
+            ready, _, _ = select.select([self.sock], [], [], wait)
+            if not ready:
+                continue
+
+            data, addr = self.sock.recvfrom(2048)
+            if random.random() < self.loss:
+                continue
+            counter += 1
+            heapq.heappush(pending, (time.monotonic() + self.delay, counter, data, addr))
+
+
+def create_prober(iface: str) -> Optional[QualityProber]:
+    """Build a prober for the tunnel on iface using the user settings."""
+    settings = load_settings()
+    target = settings.get("target") or tunnel_gateway(iface)
+    if not target:
+        return None
+
+    return QualityProber(
+        target,
+        mode=settings.get("mode", "icmp"),
+        port=int(settings.get("port", 7)),
+        interval=float(settings.get("interval", PROBE_INTERVAL)),
+    )
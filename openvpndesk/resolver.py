@@ -0,0 +1,359 @@
+"""
+Background resolver cache for profile `remote` hostnames.
+
+Resolving remotes at connect time costs seconds on slow or captive
+resolvers and fails outright when DNS already points into a dead
+tunnel. This module resolves them ahead of time with a small asyncio
+DNS client (so record TTLs are known), keeps the results on disk and
+hands fresh addresses to the helper as connect-time overrides.
+"""
+
+import asyncio
+import ipaddress
+import json
+import random
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from openvpndesk.paths import user_cache_dir, write_text_atomic
+
+
+CACHE_FILE = "resolver.json"
+
+DNS_PORT = 53
+DNS_TIMEOUT = 2.0
+QTYPE_A = 1
+QTYPE_AAAA = 28
+
+# Used when the system resolver had to answer (no TTL available)
+FALLBACK_TTL = 300
+MIN_TTL = 30
+MAX_TTL = 24 * 3600
+
+# Refresh once less than this fraction of the TTL is left
+REFRESH_AHEAD = 0.2
+
+# Bounds for the pause between refresh checks (see next_check_delay)
+MAX_CHECK_INTERVAL = 60
+MIN_CHECK_INTERVAL = 10
+
+MAX_CONCURRENCY = 16
+MAX_ADDRESSES = 8
+
+# (host, port, proto) as listed in the helper's profile catalog
+Remote = Sequence
+
+
+# --------------------------------------------------
+# Helpers
+# --------------------------------------------------
+
+def is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def system_nameservers(path: str = "/etc/resolv.conf") -> List[Tuple[str, int]]:
+    servers = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    servers.append((parts[1], DNS_PORT))
+    except OSError:
+        pass
+    return servers
+
+
+# --------------------------------------------------
+# Minimal DNS client
+# --------------------------------------------------
+
+def build_query(query_id: int, host: str, qtype: int) -> bytes:
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)
+    qname = b"".join(
+        bytes([len(label)]) + label
+        for label in host.rstrip(".").encode("idna").split(b".")
+    ) + b"\x00"
+    return header + qname + struct.pack("!HH", qtype, 1)
+
+
+def _skip_name(data: bytes, offset: int) -> int:
+    while True:
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            return offset + 2  # compression pointer ends the name
+        if length == 0:
+            return offset + 1
+        offset += 1 + length
+
+
+def parse_response(data: bytes, qtype: int) -> Tuple[int, List[str], int]:
+    """
+    Parse a DNS response into (id, addresses, ttl).
+
+    Raises ValueError for malformed or unsuccessful responses.
+    """
+    if len(data) < 12:
+        raise ValueError("short DNS response")
+
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack("!HHHHHH", data[:12])
+    if flags & 0x000F:
+        raise ValueError(f"DNS rcode {flags & 0x000F}")
+
+    offset = 12
+    for _ in range(qdcount):
+        offset = _skip_name(data, offset) + 4
+
+    addresses = []
+    ttl = None
+    for _ in range(ancount):
+        offset = _skip_name(data, offset)
+        rtype, _, rttl, rdlen = struct.unpack("!HHIH", data[offset:offset + 10])
+        offset += 10
+        rdata = data[offset:offset + rdlen]
+        offset += rdlen
+
+        if rtype != qtype:
+            continue  # CNAME chain etc.
+        family = socket.AF_INET if rtype == QTYPE_A else socket.AF_INET6
+        addresses.append(socket.inet_ntop(family, rdata))
+        ttl = rttl if ttl is None else min(ttl, rttl)
+
+    return query_id, addresses, ttl or 0
+
+
+class _DnsProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, query_id: int, qtype: int, future: asyncio.Future):
+        self.query_id = query_id
+        self.qtype = qtype
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if self.future.done():
+            return
+        try:
+            query_id, addresses, ttl = parse_response(data, self.qtype)
+        except (ValueError, IndexError, struct.error) as e:
+            self.future.set_exception(ValueError(str(e)))
+            return
+        if query_id == self.query_id:
+            self.future.set_result((addresses, ttl))
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+
+async def query_dns(host: str, qtype: int, server: Tuple[str, int],
+                    timeout: float = DNS_TIMEOUT) -> Tuple[List[str], int]:
+    loop = asyncio.get_running_loop()
+    query_id = random.randrange(0x10000)
+    future = loop.create_future()
+
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: _DnsProtocol(query_id, qtype, future),
+        remote_addr=server,
+    )
+    try:
+        transport.sendto(build_query(query_id, host, qtype))
+        return await asyncio.wait_for(future, timeout)
+    finally:
+        transport.close()
+
+
+# --------------------------------------------------
+# Cache
+# --------------------------------------------------
+
+class ResolverCache:
+    """
+    Persistent hostname -> addresses cache with TTL-based expiry.
+
+    Entries are refreshed in the background once they come within
+    REFRESH_AHEAD of expiry, so a connect normally finds fresh
+    addresses without waiting on DNS. Expired entries are never
+    handed out; the helper then falls back to the hostname.
+    """
+
+    def __init__(self, path: Optional[Path] = None,
+                 nameservers: Optional[List[Tuple[str, int]]] = None):
+        self.path = path or user_cache_dir() / CACHE_FILE
+        self.nameservers = nameservers
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._worker = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if isinstance(data, dict):
+            self._entries = data.get("entries", {})
+
+    def save(self):
+        with self._lock:
+            text = json.dumps({"entries": self._entries}, indent=1, sort_keys=True)
+        try:
+            write_text_atomic(self.path, text)
+        except OSError:
+            pass
+
+    # -------------------------------------------------
+    # Queries
+    # -------------------------------------------------
+
+    def lookup(self, host: str, now: Optional[float] = None) -> List[str]:
+        """Addresses for host if its entry has not expired, else []."""
+        now = now or time.time()
+        with self._lock:
+            entry = self._entries.get(host.lower())
+        if not entry or entry["expires"] <= now:
+            return []
+        return list(entry["addresses"])
+
+    def needs_refresh(self, host: str, now: Optional[float] = None) -> bool:
+        now = now or time.time()
+        with self._lock:
+            entry = self._entries.get(host.lower())
+        if not entry:
+            return True
+        return now >= entry["expires"] - entry["ttl"] * REFRESH_AHEAD
+
+    def next_check_delay(self, hosts: Iterable[str], now: Optional[float] = None) -> float:
+        """
+        Seconds until the first of hosts enters its refresh-ahead
+        window. Scheduling checks by this instead of a fixed period
+        keeps short-TTL entries from expiring between two checks.
+        Hosts that are already due are retried after MIN_CHECK_INTERVAL.
+        """
+        now = now or time.time()
+        delay = MAX_CHECK_INTERVAL
+        with self._lock:
+            for host in hosts:
+                if is_ip_literal(host):
+                    continue
+                entry = self._entries.get(host.lower())
+                if not entry:
+                    return MIN_CHECK_INTERVAL
+                wait = entry["expires"] - entry["ttl"] * REFRESH_AHEAD - now
+                delay = min(delay, wait if wait > 0 else MIN_CHECK_INTERVAL)
+        return delay
+
+    def overrides_for(self, remotes: Iterable[Remote]) -> Dict[str, List[str]]:
+        """Map each resolvable remote host to its cached addresses."""
+        overrides = {}
+        for host, _, _ in remotes:
+            if is_ip_literal(host) or host in overrides:
+                continue
+            addresses = self.lookup(host)
+            if addresses:
+                overrides[host] = addresses
+        return overrides
+
+    # -------------------------------------------------
+    # Resolution
+    # -------------------------------------------------
+
+    async def _resolve_dns(self, host: str) -> Tuple[List[str], int]:
+        servers = self.nameservers
+        if servers is None:
+            servers = system_nameservers()
+
+        for server in servers:
+            try:
+                results = await asyncio.gather(
+                    query_dns(host, QTYPE_A, server),
+                    query_dns(host, QTYPE_AAAA, server),
+                    return_exceptions=True,
+                )
+            except OSError:
+                continue
+
+            addresses = []
+            ttls = []
+            for result in results:
+                if isinstance(result, BaseException):
+                    continue
+                found, ttl = result
+                if found:
+                    addresses.extend(found)
+                    ttls.append(ttl)
+            if addresses:
+                return addresses, min(ttls)
+
+        return [], 0
+
+    async def _resolve_system(self, host: str) -> List[str]:
+        loop = asyncio.get_running_loop()
+        try:
+            infos = await loop.getaddrinfo(host, None, type=socket.SOCK_DGRAM)
+        except (socket.gaierror, OSError):
+            return []
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    async def resolve(self, host: str) -> bool:
+        """Resolve host and store the result; return True on success."""
+        addresses, ttl = await self._resolve_dns(host)
+        if not addresses and self.nameservers is None:
+            addresses = await self._resolve_system(host)
+            ttl = FALLBACK_TTL
+        if not addresses:
+            return False
+
+        ttl = max(MIN_TTL, min(MAX_TTL, ttl))
+        now = time.time()
+        with self._lock:
+            self._entries[host.lower()] = {
+                "addresses": addresses[:MAX_ADDRESSES],
+                "ttl": ttl,
+                "resolved_at": now,
+                "expires": now + ttl,
+            }
+        return True
+
+    async def refresh(self, hosts: Iterable[str]) -> int:
+        """Resolve every host that is missing or close to expiry."""
+        pending = sorted({
+            h.lower() for h in hosts
+            if not is_ip_literal(h) and self.needs_refresh(h)
+        })
+        if not pending:
+            return 0
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        async def bounded(host):
+            async with semaphore:
+                return await self.resolve(host)
+
+        results = await asyncio.gather(*(bounded(h) for h in pending))
+        self.save()
+        return sum(1 for ok in results if ok)
+
+    def refresh_in_background(self, hosts: Iterable[str]):
+        """
+        Refresh hosts on a worker thread. A no-op while a previous
+        refresh is still running.
+        """
+        if self._worker and self._worker.is_alive():
+            return
+
+        hosts = list(hosts)
+        self._worker = threading.Thread(
+            target=lambda: asyncio.run(self.refresh(hosts)),
+            daemon=True
+        )
+        self._worker.start()
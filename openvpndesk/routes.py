@@ -0,0 +1,229 @@
+"""
+Split-tunnel route engine.
+
+Turns user supplied include/exclude CIDR lists into the minimal set of
+prefixes covering exactly (includes - excludes), for IPv4 and IPv6.
+Prefixes are handled as integer intervals: sort, merge, subtract with
+two pointers, then cut each interval back into aligned CIDR blocks.
+This stays linear after the sort, where ipaddress' exclude/collapse
+helpers become slow on tens of thousands of prefixes.
+
+    python -m openvpndesk.routes --bench [N]
+"""
+
+import bisect
+import ipaddress
+import json
+import random
+import sys
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from openvpndesk.paths import user_config_dir, write_text_atomic
+
+Interval = Tuple[int, int]  # inclusive [start, end]
+
+BITS = {4: 32, 6: 128}
+
+SPLIT_SETTINGS_DIR = "split-tunnel"
+
+# Used for "everything except the excludes"
+ALL_ADDRESSES = (ipaddress.ip_network("0.0.0.0/0"), ipaddress.ip_network("::/0"))
+
+
+def parse_networks(lines: Iterable[str]):
+    """
+    Parse CIDRs (one per line, `#` comments allowed).
+
+    Host bits are masked off. Returns (networks, invalid_lines).
+    """
+    networks = []
+    invalid = []
+    for line in lines:
+        text = line.split("#", 1)[0].strip()
+        if not text:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(text, strict=False))
+        except ValueError:
+            invalid.append(line.strip())
+    return networks, invalid
+
+
+def to_intervals(networks) -> Dict[int, List[Interval]]:
+    intervals: Dict[int, List[Interval]] = {4: [], 6: []}
+    for net in networks:
+        start = int(net.network_address)
+        intervals[net.version].append((start, start + net.num_addresses - 1))
+    return intervals
+
+
+def merge(intervals: List[Interval]) -> List[Interval]:
+    """Sort and coalesce overlapping or adjacent intervals."""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract(include: List[Interval], exclude: List[Interval]) -> List[Interval]:
+    """include - exclude; both must be merged (sorted, disjoint)."""
+    result = []
+    j = 0
+    for start, end in include:
+        while j < len(exclude) and exclude[j][1] < start:
+            j += 1
+        k = j
+        while k < len(exclude) and exclude[k][0] <= end:
+            ex_start, ex_end = exclude[k]
+            if ex_start > start:
+                result.append((start, ex_start - 1))
+            start = max(start, ex_end + 1)
+            if start > end:
+                break
+            k += 1
+        if start <= end:
+            result.append((start, end))
+    return result
+
+
+def interval_to_prefixes(start: int, end: int, bits: int) -> List[Tuple[int, int]]:
+    """Minimal list of aligned (network, prefixlen) blocks covering [start, end]."""
+    prefixes = []
+    while start <= end:
+        # Largest block aligned at start...
+        size = start & -start if start else 1 << bits
+        # ...that does not run past end
+        while size > end - start + 1:
+            size >>= 1
+        prefixes.append((start, bits - size.bit_length() + 1))
+        start += size
+    return prefixes
+
+
+def compute_routes(include, exclude) -> List:
+    """
+    Minimal prefix list (IPv4 first, then IPv6, each sorted) covering
+    exactly the addresses in `include` but not in `exclude`.
+    """
+    inc = to_intervals(include)
+    exc = to_intervals(exclude)
+
+    routes = []
+    for version, cls in ((4, ipaddress.IPv4Network), (6, ipaddress.IPv6Network)):
+        remaining = subtract(merge(inc[version]), merge(exc[version]))
+        for start, end in remaining:
+            for network, prefixlen in interval_to_prefixes(start, end, BITS[version]):
+                routes.append(cls((network, prefixlen)))
+    return routes
+
+
+def same_address_set(a, b) -> bool:
+    """True when both network lists cover exactly the same addresses."""
+    ia, ib = to_intervals(a), to_intervals(b)
+    return all(merge(ia[v]) == merge(ib[v]) for v in (4, 6))
+
+
+# --------------------------------------------------
+# Per-profile include/exclude lists
+# --------------------------------------------------
+
+def load_split_settings(profile_name: str) -> Dict[str, List[str]]:
+    path = user_config_dir() / SPLIT_SETTINGS_DIR / f"{profile_name}.json"
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        data = {}
+    return {
+        "include": list(data.get("include", [])),
+        "exclude": list(data.get("exclude", [])),
+    }
+
+
+def save_split_settings(profile_name: str, include: List[str], exclude: List[str]):
+    path = user_config_dir() / SPLIT_SETTINGS_DIR / f"{profile_name}.json"
+    write_text_atomic(path, json.dumps({"include": include, "exclude": exclude}, indent=1))
+
+
+# --------------------------------------------------
+# Benchmark
+# --------------------------------------------------
+
+def _random_networks(count: int, rng: random.Random):
+    networks = []
+    for _ in range(count):
+        if rng.random() < 0.8:
+            prefixlen = rng.randint(8, 32)
+            address = rng.getrandbits(32) >> (32 - prefixlen) << (32 - prefixlen)
+            networks.append(ipaddress.IPv4Network((address, prefixlen)))
+        else:
+            prefixlen = rng.randint(16, 64)
+            address = rng.getrandbits(128) >> (128 - prefixlen) << (128 - prefixlen)
+            networks.append(ipaddress.IPv6Network((address, prefixlen)))
+    return networks
+
+
+def _baseline(include, exclude):
+    """Reference result built from ipaddress' own primitives."""
+    result = []
+    for version in (4, 6):
+        inc = list(ipaddress.collapse_addresses(n for n in include if n.version == version))
+        exc = list(ipaddress.collapse_addresses(n for n in exclude if n.version == version))
+        exc_starts = [int(e.network_address) for e in exc]
+
+        for net in inc:
+            # Collapsed excludes are disjoint and sorted: only the ones
+            # starting inside net, or the one just before it, can overlap
+            lo = max(0, bisect.bisect_right(exc_starts, int(net.network_address)) - 1)
+            hi = bisect.bisect_right(exc_starts, int(net.broadcast_address))
+
+            pieces = [net]
+            for ex in exc[lo:hi]:
+                next_pieces = []
+                for piece in pieces:
+                    if ex.supernet_of(piece):
+                        continue
+                    if piece.supernet_of(ex):
+                        next_pieces.extend(piece.address_exclude(ex))
+                    else:
+                        next_pieces.append(piece)
+                pieces = next_pieces
+            result.extend(pieces)
+
+        result = [n for n in result if n.version != version] + \
+            list(ipaddress.collapse_addresses(n for n in result if n.version == version))
+    return result
+
+
+def benchmark(count: int = 50_000, seed: int = 1):
+    rng = random.Random(seed)
+    include = _random_networks(count, rng)
+    exclude = _random_networks(count // 5, rng)
+
+    started = time.perf_counter()
+    routes = compute_routes(include, exclude)
+    elapsed = time.perf_counter() - started
+    print(f"route engine: {count} include + {len(exclude)} exclude "
+          f"-> {len(routes)} prefixes in {elapsed * 1000:.0f} ms")
+
+    started = time.perf_counter()
+    expected = _baseline(include, exclude)
+    elapsed = time.perf_counter() - started
+    print(f"ipaddress baseline: {len(expected)} prefixes in {elapsed * 1000:.0f} ms")
+
+    print("equivalent:", same_address_set(routes, expected) and len(routes) == len(expected))
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        args = [a for a in sys.argv[1:] if a != "--bench"]
+        benchmark(int(args[0]) if args else 50_000)
+    else:
+        nets, bad = parse_networks(sys.stdin)
+        for net in compute_routes(nets, []):
+            print(net)
@@ -0,0 +1,177 @@
+"""
+Debug-mode GTK main loop stall detector.
+
+A high-priority heartbeat runs on the GLib main loop and a watchdog
+thread notices when it is late. At that moment the main thread's
+Python stack is captured, which tells which signal handler is
+blocking the UI. Enable with OPENVPN_DESK_DEBUG=1 or --debug; a
+summary is printed to stderr when the application exits.
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, List, Optional
+
+from gi.repository import GLib
+
+
+DEBUG_ENV = "OPENVPN_DESK_DEBUG"
+
+HEARTBEAT_MS = 50
+STALL_THRESHOLD_MS = 150
+STACK_DEPTH = 12
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def stall_monitoring_enabled(argv: Optional[List[str]] = None) -> bool:
+    argv = sys.argv if argv is None else argv
+    return "--debug" in argv or os.environ.get(DEBUG_ENV, "") not in ("", "0")
+
+
+def _in_package(filename: str) -> bool:
+    return os.path.abspath(filename).startswith(PACKAGE_DIR + os.sep)
+
+
+def handler_name(frame, entry_frames=()) -> str:
+    """
+    Name of the innermost application function that was entered from
+    outside the package, i.e. called by GTK/GLib rather than by our own
+    code. For a click this is the on_*_clicked handler.
+
+    entry_frames are the frames that started the main loop (main() and
+    its callers); they never count as handlers, so a stall in GTK
+    layout or drawing with no handler on the stack is "<main loop>".
+    """
+    entry_ids = {id(f) for f in entry_frames}
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+
+    name = None
+    caller_in_package = False
+    for f in frames:
+        if id(f) in entry_ids:
+            caller_in_package = True
+            continue
+        inside = _in_package(f.f_code.co_filename)
+        if inside and not caller_in_package:
+            code = f.f_code
+            name = getattr(code, "co_qualname", code.co_name)
+        caller_in_package = inside
+    return name or "<main loop>"
+
+
+class _HandlerStats:
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.worst_stack: List[str] = []
+
+    def add(self, duration_ms: float, stack: List[str]):
+        self.count += 1
+        self.total_ms += duration_ms
+        if duration_ms > self.max_ms:
+            self.max_ms = duration_ms
+            self.worst_stack = stack
+
+
+class StallMonitor:
+    """
+    Records main loop stalls longer than threshold_ms, per handler.
+
+    start() must be called from the thread that runs the main loop.
+    """
+
+    def __init__(self, interval_ms: int = HEARTBEAT_MS,
+                 threshold_ms: int = STALL_THRESHOLD_MS):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self.stats: Dict[str, _HandlerStats] = {}
+
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._pending = None  # (handler, stack) of the stall in progress
+        self._main_ident = None
+        self._entry_frames = ()
+        self._stop = threading.Event()
+        self._source_id = None
+
+    def start(self):
+        self._main_ident = threading.get_ident()
+        # The caller (main()) and everything above it stay on the stack
+        # while the loop runs; keep them so they are not taken for handlers
+        frames = []
+        frame = sys._getframe(1)
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        self._entry_frames = tuple(frames)
+        self._last_beat = time.monotonic()
+        self._source_id = GLib.timeout_add(
+            int(self.interval * 1000), self._beat, priority=GLib.PRIORITY_HIGH
+        )
+        threading.Thread(target=self._watch, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        self._entry_frames = ()
+        if self._source_id is not None:
+            GLib.source_remove(self._source_id)
+            self._source_id = None
+
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._pending is not None:
+                handler, stack = self._pending
+                late_ms = (now - self._last_beat - self.interval) * 1000
+                self.stats.setdefault(handler, _HandlerStats()).add(late_ms, stack)
+                self._pending = None
+            self._last_beat = now
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                late = time.monotonic() - self._last_beat - self.interval
+                if late < self.threshold or self._pending is not None:
+                    continue
+
+                frame = sys._current_frames().get(self._main_ident)
+                if frame is None:
+                    continue
+                stack = traceback.format_stack(frame)[-STACK_DEPTH:]
+                self._pending = (handler_name(frame, self._entry_frames), stack)
+
+    def report(self) -> str:
+        """Stall counts and durations per handler, worst offenders first."""
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda kv: kv[1].total_ms, reverse=True)
+
+        if not rows:
+            return f"No main loop stalls above {self.threshold * 1000:.0f} ms\n"
+
+        lines = [
+            f"Main loop stalls above {self.threshold * 1000:.0f} ms",
+            f"{'handler':<40} {'count':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}",
+        ]
+        for handler, s in rows:
+            lines.append(
+                f"{handler:<40} {s.count:>6} {s.total_ms:>10.0f} "
+                f"{s.total_ms / s.count:>9.0f} {s.max_ms:>9.0f}"
+            )
+
+        for handler, s in rows:
+            lines.append("")
+            lines.append(f"Worst stall in {handler} ({s.max_ms:.0f} ms):")
+            lines.extend(line.rstrip("\n") for line in s.worst_stack)
+
+        return "\n".join(lines) + "\n"
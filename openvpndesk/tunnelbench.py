@@ -0,0 +1,586 @@
+"""
+Tunnel throughput benchmark.
+
+Runs timed bulk TCP (upload and download) and UDP transfers against a
+small bundled server, measuring goodput, TCP retransmits (TCP_INFO)
+and the CPU used by the profile's openvpn process meanwhile. Results
+are kept per profile together with the config hash from the helper's
+catalog, so runs before and after a profile change can be compared.
+
+    openvpn-desk-bench serve [--host 0.0.0.0] [--port 5205]
+    openvpn-desk-bench run PROFILE --server HOST[:PORT] [--seconds 10]
+    openvpn-desk-bench history PROFILE
+
+The server has to be reachable through the tunnel, e.g. run `serve`
+on the VPN server or on a host behind it; runs against endpoints that
+are not routed via a tun/tap device are refused. For a local dry run
+start it on 127.0.0.1 and pass --allow-untunneled (not stored). The
+profile has to be the one connected.
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import statistics
+import struct
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from openvpndesk.paths import user_config_dir, user_data_dir, write_text_atomic
+
+
+DEFAULT_PORT = 5205
+DEFAULT_SECONDS = 10
+DEFAULT_UDP_MBPS = 20
+
+SETTINGS_FILE = "benchmark.json"
+RESULTS_DIR = "benchmarks"
+
+TCP_CHUNK = 128 * 1024
+UDP_PAYLOAD = 1200
+UDP_MAGIC = b"ODQB"
+UDP_GRACE = 0.5
+CONNECT_TIMEOUT = 5.0
+
+# Sessions the server remembers statistics for
+MAX_SESSIONS = 64
+
+# struct tcp_info: 8 u8 fields, then u32s; tcpi_total_retrans is the 24th
+TCP_INFO_FORMAT = "8B24I"
+TCP_INFO_TOTAL_RETRANS = 8 + 23
+
+
+# --------------------------------------------------
+# Server
+# --------------------------------------------------
+
+class _Sessions:
+    """Bounded per-session counters shared by the TCP and UDP sides."""
+
+    def __init__(self):
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, session: str, **values):
+        with self._lock:
+            stats = self._data.setdefault(session, {"udp_packets": 0, "udp_bytes": 0})
+            for key, value in values.items():
+                if key.startswith("udp_"):
+                    stats[key] += value
+                else:
+                    stats[key] = value
+            self._data.move_to_end(session)
+            while len(self._data) > MAX_SESSIONS:
+                self._data.popitem(last=False)
+
+    def get(self, session: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._data.get(session, {}))
+
+
+def tcp_retransmits(sock: socket.socket) -> Optional[int]:
+    """tcpi_total_retrans of a connected socket, None if unavailable."""
+    if not hasattr(socket, "TCP_INFO"):
+        return None
+    try:
+        raw = sock.getsockopt(
+            socket.IPPROTO_TCP, socket.TCP_INFO, struct.calcsize(TCP_INFO_FORMAT)
+        )
+    except OSError:
+        return None
+    if len(raw) < struct.calcsize(TCP_INFO_FORMAT):
+        return None
+    return struct.unpack(TCP_INFO_FORMAT, raw)[TCP_INFO_TOTAL_RETRANS]
+
+
+class _TcpHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline(4096))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+
+        session = str(request.get("session", ""))
+        mode = request.get("mode")
+        sessions = self.server.sessions
+
+        if mode == "upload":
+            received = 0
+            while True:
+                data = self.rfile.read1(TCP_CHUNK)
+                if not data:
+                    break
+                received += len(data)
+            self.wfile.write(json.dumps({"bytes": received}).encode() + b"\n")
+
+        elif mode == "download":
+            seconds = min(float(request.get("seconds", DEFAULT_SECONDS)), 120.0)
+            chunk = b"\x00" * TCP_CHUNK
+            sent = 0
+            deadline = time.monotonic() + seconds
+            try:
+                while time.monotonic() < deadline:
+                    self.connection.sendall(chunk)
+                    sent += len(chunk)
+            except OSError:
+                pass
+            sessions.update(
+                session,
+                download_bytes=sent,
+                download_retransmits=tcp_retransmits(self.connection),
+            )
+
+        elif mode == "stats":
+            self.wfile.write(json.dumps(sessions.get(session)).encode() + b"\n")
+
+
+class _ThreadingTcpServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class BenchServer:
+    """Minimal benchmark server: TCP sink/source and UDP counter."""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT):
+        self.sessions = _Sessions()
+        self.tcp = _ThreadingTcpServer((host, port), _TcpHandler)
+        self.tcp.sessions = self.sessions
+        self.address = self.tcp.server_address
+
+        self.udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp.bind((host, self.address[1]))
+        self.udp.settimeout(0.5)
+        self._stop = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.tcp.serve_forever, daemon=True).start()
+        threading.Thread(target=self._udp_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.tcp.shutdown()
+        self.tcp.server_close()
+        self.udp.close()
+
+    def _udp_loop(self):
+        while not self._stop.is_set():
+            try:
+                data = self.udp.recv(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if data[:4] != UDP_MAGIC or len(data) < 20:
+                continue
+            session = data[4:20].hex()
+            self.sessions.update(session, udp_packets=1, udp_bytes=len(data))
+
+
+# --------------------------------------------------
+# Client
+# --------------------------------------------------
+
+def parse_endpoint(text: str) -> Tuple[str, int]:
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit() and not host.endswith(":"):
+        return host.strip("[]"), int(port)
+    return text.strip("[]"), DEFAULT_PORT
+
+
+def _request(endpoint: Tuple[str, int], payload: Dict[str, Any]) -> socket.socket:
+    sock = socket.create_connection(endpoint, timeout=CONNECT_TIMEOUT)
+    sock.sendall(json.dumps(payload).encode() + b"\n")
+    return sock
+
+
+def _read_json_line(sock: socket.socket) -> Dict[str, Any]:
+    with sock.makefile("rb") as f:
+        line = f.readline(65536)
+    return json.loads(line) if line else {}
+
+
+def fetch_stats(endpoint: Tuple[str, int], session: str) -> Dict[str, Any]:
+    with _request(endpoint, {"mode": "stats", "session": session}) as sock:
+        return _read_json_line(sock)
+
+
+def run_tcp_upload(endpoint, seconds: float) -> Dict[str, Any]:
+    chunk = b"\x00" * TCP_CHUNK
+    with _request(endpoint, {"mode": "upload"}) as sock:
+        sock.settimeout(seconds + CONNECT_TIMEOUT)
+        started = time.monotonic()
+        deadline = started + seconds
+        while time.monotonic() < deadline:
+            sock.sendall(chunk)
+        retransmits = tcp_retransmits(sock)
+        sock.shutdown(socket.SHUT_WR)
+        # Only count what the server actually received
+        received = _read_json_line(sock).get("bytes", 0)
+        elapsed = time.monotonic() - started
+
+    return {
+        "tcp_upload_mbps": received * 8 / elapsed / 1e6,
+        "tcp_upload_retransmits": retransmits,
+    }
+
+
+def run_tcp_download(endpoint, seconds: float) -> Dict[str, Any]:
+    session = uuid.uuid4().hex
+    received = 0
+    with _request(endpoint, {"mode": "download", "seconds": seconds, "session": session}) as sock:
+        sock.settimeout(seconds + CONNECT_TIMEOUT)
+        started = time.monotonic()
+        while True:
+            data = sock.recv(TCP_CHUNK)
+            if not data:
+                break
+            received += len(data)
+        elapsed = time.monotonic() - started
+
+    stats = fetch_stats(endpoint, session)
+    return {
+        "tcp_download_mbps": received * 8 / elapsed / 1e6,
+        "tcp_download_retransmits": stats.get("download_retransmits"),
+    }
+
+
+def run_udp(endpoint, seconds: float, rate_mbps: float) -> Dict[str, Any]:
+    session = uuid.uuid4()
+    header = UDP_MAGIC + session.bytes
+    padding = b"\x00" * (UDP_PAYLOAD - len(header) - 8)
+
+    per_second = rate_mbps * 1e6 / 8 / UDP_PAYLOAD
+    sent = 0
+
+    family = socket.getaddrinfo(endpoint[0], endpoint[1], type=socket.SOCK_DGRAM)[0][0]
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.connect(endpoint)
+        started = time.monotonic()
+        deadline = started + seconds
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            # Pace by catching up to the packet count due by now
+            due = int((now - started) * per_second)
+            while sent < due:
+                try:
+                    sock.send(header + struct.pack("!Q", sent) + padding)
+                except OSError:
+                    pass  # ENOBUFS under load counts as loss
+                sent += 1
+            time.sleep(0.001)
+
+    time.sleep(UDP_GRACE)
+    stats = fetch_stats(endpoint, session.hex)
+    packets = stats.get("udp_packets", 0)
+    return {
+        "udp_mbps": stats.get("udp_bytes", 0) * 8 / seconds / 1e6,
+        "udp_loss_pct": 100.0 * (1 - packets / sent) if sent else 0.0,
+    }
+
+
+# --------------------------------------------------
+# openvpn CPU accounting
+# --------------------------------------------------
+
+def openvpn_pid(profile_name: str) -> Optional[int]:
+    """PID of the profile's openvpn process, None while it is not running."""
+    try:
+        result = subprocess.run(
+            ["systemctl", "show", "-p", "MainPID", "--value", f"openvpn@{profile_name}"],
+            capture_output=True,
+            text=True
+        )
+    except OSError:
+        return None
+    pid = result.stdout.strip()
+    return int(pid) if pid.isdigit() and pid != "0" else None
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Fields after the parenthesised command name; utime/stime are 14/15
+    fields = stat.rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def route_device(host: str) -> Optional[str]:
+    """Network device the kernel routes host through, per `ip route get`."""
+    try:
+        address = socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)[0][4][0]
+        output = subprocess.run(
+            ["ip", "route", "get", address],
+            capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, socket.gaierror, subprocess.CalledProcessError):
+        return None
+
+    parts = output.split()
+    if "dev" in parts[:-1]:
+        return parts[parts.index("dev") + 1]
+    return None
+
+
+def is_tunnel_device(device: str) -> bool:
+    # Only tun/tap devices have tun_flags; one VPN is active at a time
+    return os.path.exists(f"/sys/class/net/{device}/tun_flags")
+
+
+def run_benchmark(profile_name: str, endpoint: Tuple[str, int],
+                  seconds: float = DEFAULT_SECONDS,
+                  udp_mbps: float = DEFAULT_UDP_MBPS,
+                  config_sha256: Optional[str] = None,
+                  allow_untunneled: bool = False) -> Dict[str, Any]:
+    """
+    Run all transfers and return one result record.
+
+    Raises ValueError when the profile is not the one connected, or
+    the endpoint is not routed through a tunnel device (loopback, LAN,
+    outside the split-tunnel routes), unless allow_untunneled is set
+    for a dry run. Such results must not be stored (see is_storable).
+    """
+    pid = openvpn_pid(profile_name)
+    if pid is None and not allow_untunneled:
+        raise ValueError(f"{profile_name} is not connected")
+
+    device = route_device(endpoint[0])
+    tunneled = device is not None and is_tunnel_device(device)
+    if not tunneled and not allow_untunneled:
+        raise ValueError(
+            f"{endpoint[0]} is routed via {device or 'an unknown device'}, "
+            f"not through the VPN tunnel"
+        )
+
+    cpu_before = process_cpu_seconds(pid) if pid else None
+    started = time.monotonic()
+
+    result: Dict[str, Any] = {
+        "time": time.time(),
+        "profile": profile_name,
+        "config_sha256": config_sha256,
+        "endpoint": f"{endpoint[0]}:{endpoint[1]}",
+        "device": device,
+        "tunneled": tunneled,
+        "connected": pid is not None,
+        "seconds": seconds,
+    }
+    result.update(run_tcp_upload(endpoint, seconds))
+    result.update(run_tcp_download(endpoint, seconds))
+    result.update(run_udp(endpoint, seconds, udp_mbps))
+
+    # A disconnect or switch during the run leaves a different process
+    if pid is not None and openvpn_pid(profile_name) != pid:
+        result["connected"] = False
+        if not allow_untunneled:
+            raise ValueError(f"{profile_name} disconnected during the benchmark")
+
+    cpu_after = process_cpu_seconds(pid) if pid else None
+    elapsed = time.monotonic() - started
+    if cpu_before is not None and cpu_after is not None:
+        result["openvpn_cpu_pct"] = 100.0 * (cpu_after - cpu_before) / elapsed
+    else:
+        result["openvpn_cpu_pct"] = None
+    return result
+
+
+# --------------------------------------------------
+# Results history
+# --------------------------------------------------
+
+def is_storable(result: Dict[str, Any]) -> bool:
+    """Only runs through this profile's own tunnel belong in its history."""
+    return bool(result.get("tunneled") and result.get("connected"))
+
+
+def _results_path(profile_name: str):
+    return user_data_dir() / RESULTS_DIR / f"{profile_name}.jsonl"
+
+
+def save_result(result: Dict[str, Any]):
+    path = _results_path(result["profile"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result, sort_keys=True) + "\n")
+
+
+def load_results(profile_name: str) -> List[Dict[str, Any]]:
+    results = []
+    try:
+        with open(_results_path(profile_name), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except OSError:
+        pass
+    return results
+
+
+SUMMARY_FIELDS = (
+    "tcp_upload_mbps",
+    "tcp_download_mbps",
+    "tcp_upload_retransmits",
+    "tcp_download_retransmits",
+    "udp_mbps",
+    "udp_loss_pct",
+    "openvpn_cpu_pct",
+)
+
+
+def summarize_by_config(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Median of each metric per config hash, in order of first use,
+    so configurations can be compared side by side.
+    """
+    groups: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+    for result in sorted(results, key=lambda r: r.get("time", 0)):
+        groups.setdefault(result.get("config_sha256") or "unknown", []).append(result)
+
+    summary = []
+    for config, runs in groups.items():
+        row = {"config_sha256": config, "runs": len(runs), "last": runs[-1].get("time")}
+        for field in SUMMARY_FIELDS:
+            values = [r[field] for r in runs if r.get(field) is not None]
+            row[field] = statistics.median(values) if values else None
+        summary.append(row)
+    return summary
+
+
+def load_settings() -> Dict[str, Any]:
+    try:
+        with open(user_config_dir() / SETTINGS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_settings(settings: Dict[str, Any]):
+    write_text_atomic(user_config_dir() / SETTINGS_FILE, json.dumps(settings, indent=1))
+
+
+# --------------------------------------------------
+# CLI
+# --------------------------------------------------
+
+def format_value(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def _print_history(profile_name: str):
+    results = load_results(profile_name)
+    if not results:
+        print(f"No benchmark results for {profile_name}")
+        return
+
+    print(f"{'config':<10} {'runs':>4} {'tcp up':>9} {'tcp down':>9} "
+          f"{'rtx up':>7} {'rtx down':>8} {'udp':>9} {'loss %':>7} {'cpu %':>6}  last run")
+    for row in summarize_by_config(results):
+        print(
+            f"{row['config_sha256'][:10]:<10} {row['runs']:>4} "
+            f"{format_value(row['tcp_upload_mbps'], '.1f'):>9} "
+            f"{format_value(row['tcp_download_mbps'], '.1f'):>9} "
+            f"{format_value(row['tcp_upload_retransmits'], '.0f'):>7} "
+            f"{format_value(row['tcp_download_retransmits'], '.0f'):>8} "
+            f"{format_value(row['udp_mbps'], '.1f'):>9} "
+            f"{format_value(row['udp_loss_pct'], '.2f'):>7} "
+            f"{format_value(row['openvpn_cpu_pct'], '.0f'):>6}  "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(row['last']))}"
+        )
+    print("(throughput in Mbps, retransmits per run, medians per config hash)")
+
+
+def _config_hash(profile_name: str) -> Optional[str]:
+    from openvpndesk.backend import VpnBackend, VpnBackendError
+
+    try:
+        profiles = VpnBackend().list_profiles()
+    except VpnBackendError:
+        return None
+    for profile in profiles:
+        if profile.get("name") == profile_name:
+            return profile.get("sha256")
+    return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="openvpn-desk-bench",
+        description="Benchmark throughput through an OpenVPN Desk tunnel"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="run the benchmark server")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+
+    run = sub.add_parser("run", help="benchmark the active tunnel of a profile")
+    run.add_argument("profile")
+    run.add_argument("--server", help="HOST[:PORT] of a benchmark server")
+    run.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    run.add_argument("--udp-mbps", type=float, default=DEFAULT_UDP_MBPS)
+    run.add_argument("--allow-untunneled", action="store_true",
+                     help="run even if the server is not reached through the "
+                          "tunnel; the result is printed but not stored")
+
+    history = sub.add_parser("history", help="show stored results")
+    history.add_argument("profile")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = BenchServer(args.host, args.port).start()
+        print(f"Benchmark server listening on {server.address[0]}:{server.address[1]}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.stop()
+
+    elif args.command == "run":
+        settings = load_settings()
+        server = args.server or settings.get("server")
+        if not server:
+            parser.error("--server is required (or set it once in the GUI)")
+
+        try:
+            result = run_benchmark(
+                args.profile,
+                parse_endpoint(server),
+                seconds=args.seconds,
+                udp_mbps=args.udp_mbps,
+                config_sha256=_config_hash(args.profile),
+                allow_untunneled=args.allow_untunneled,
+            )
+        except (OSError, ValueError) as e:
+            print(f"Benchmark failed: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if is_storable(result):
+            save_result(result)
+        if args.server:
+            save_settings(dict(settings, server=args.server))
+        print(json.dumps(result, indent=1, sort_keys=True))
+
+    elif args.command == "history":
+        _print_history(args.profile)
+
+
+if __name__ == "__main__":
+    main()
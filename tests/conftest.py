@@ -0,0 +1,16 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+
+HELPER_PATH = Path(__file__).resolve().parent.parent / "helper" / "helper.py"
+
+
+@pytest.fixture(scope="session")
+def helper():
+    """The privileged helper, loaded as a module (it is not a package)."""
+    spec = importlib.util.spec_from_file_location("openvpn_desk_helper", HELPER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+
+CONFIG = """client
+remote vpn.example.com 1194
+<ca>
+-----BEGIN CERTIFICATE-----
+MIIB
+-----END CERTIFICATE-----
+</ca>
+"""
+
+
+@pytest.fixture
+def store(helper, monkeypatch, tmp_path):
+    monkeypatch.setattr(helper, "STORE_DIR", str(tmp_path / "store"))
+    return tmp_path / "store"
+
+
+@pytest.fixture
+def installed(helper, store, monkeypatch, tmp_path):
+    """Three installed profiles sharing one CA, no tunnel active."""
+    conf_dir = tmp_path / "openvpn"
+    conf_dir.mkdir()
+    monkeypatch.setattr(helper, "OPENVPN_DIR", str(conf_dir))
+    monkeypatch.setattr(helper, "STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(helper, "get_active_vpns", lambda: [])
+
+    names = ["a", "b", "c"]
+    wanted = {}
+    for name in names:
+        conf_path, auth_path = helper.profile_paths(name)
+        compact, wanted[name] = helper.extract_inline_blobs(CONFIG)
+        helper.write_conf_file(conf_path, compact, auth_path)
+    helper.retain_blobs(wanted)
+    return names
+
+
+def update(helper, capsys, items):
+    with pytest.raises(SystemExit):
+        helper.handle_update_profile({"profiles": items})
+    return json.loads(capsys.readouterr().out)
+
+
+def test_inline_blocks_move_to_store(helper, store):
+    compact, digests = helper.extract_inline_blobs(CONFIG)
+
+    assert len(digests) == 1
+    assert f"ca {store / digests[0]}" in compact.splitlines()
+    assert "<ca>" not in compact
+    assert (store / digests[0]).read_text().startswith("-----BEGIN CERTIFICATE-----")
+
+
+@pytest.mark.parametrize("extra, stays_inline", [
+    ("user nobody\ngroup nogroup\n", True),
+    ("group nogroup\n", True),
+    ("user nobody\npersist-key\n", False),
+    ("persist-tun\n", False),
+])
+def test_unprivileged_key_reload_stays_inline(helper, store, extra, stays_inline):
+    content = CONFIG + extra
+    compact, digests = helper.extract_inline_blobs(content)
+
+    assert (compact == content) == stays_inline
+    assert bool(digests) != stays_inline
+
+
+def test_blobs_are_shared_and_collected(helper, store, installed):
+    refs = helper.load_store_refs()
+    assert list(refs.values()) == [["a", "b", "c"]]
+
+    helper.retain_blobs({"a": [], "b": []})
+    assert list(helper.load_store_refs().values()) == [["c"]]
+
+    helper.retain_blobs({"c": []})
+    assert helper.load_store_refs() == {}
+    assert [p.name for p in store.iterdir()] == [helper.STORE_REFS]
+
+
+def test_orphaned_blobs_are_collected(helper, store, installed):
+    orphan = helper.store_blob("never referenced\n")
+    helper.retain_blobs({})
+    assert not orphan.exists()
+
+
+def test_batch_update_writes_refs_once(helper, store, installed, monkeypatch, capsys):
+    writes = []
+    atomic_write = helper.atomic_write
+
+    def counting_write(path, content, mode):
+        writes.append(path.name)
+        atomic_write(path, content, mode)
+
+    monkeypatch.setattr(helper, "atomic_write", counting_write)
+
+    rotated = CONFIG.replace("MIIB", "MIIC")
+    result = update(helper, capsys, [
+        {"profile_name": name, "ovpn_content": rotated if name != "c" else CONFIG}
+        for name in installed
+    ])
+
+    assert [r["changed"] for r in result["results"]] == [True, True, False]
+    assert writes.count(helper.STORE_REFS) == 1
+    assert writes.count("a.conf") == writes.count("b.conf") == 1
+    assert "c.conf" not in writes
+
+    refs = helper.load_store_refs()
+    assert sorted(refs.values()) == [["a", "b"], ["c"]]
+    assert {p.name for p in store.iterdir()} == set(refs) | {helper.STORE_REFS}
@@ -0,0 +1,53 @@
+import json
+import subprocess
+
+import pytest
+
+
+@pytest.fixture
+def units(helper, monkeypatch, tmp_path):
+    """Fake systemd: records systemctl calls, fails start of broken units."""
+    (tmp_path / "work.conf").write_text("client\n")
+    (tmp_path / "home.conf").write_text("client\n")
+    monkeypatch.setattr(helper, "OPENVPN_DIR", str(tmp_path))
+
+    state = {"active": ["home"], "broken": set(), "calls": []}
+
+    def systemctl(args):
+        state["calls"].append(args)
+        unit = args[-1].split("@", 1)[1]
+        if args[0] == "start" and unit in state["broken"]:
+            raise subprocess.CalledProcessError(1, ["systemctl"] + args)
+        if args[0] == "stop" and unit in state["active"]:
+            state["active"].remove(unit)
+        elif args[0] == "start":
+            state["active"].append(unit)
+
+    monkeypatch.setattr(helper, "systemctl", systemctl)
+    monkeypatch.setattr(helper, "get_active_vpns", lambda: list(state["active"]))
+    monkeypatch.setattr(helper, "wait_until_active", lambda name, timeout: name in state["active"])
+    monkeypatch.setattr(helper.subprocess, "run", lambda args, **kw: systemctl(args[1:]))
+    return state
+
+
+def run_switch(helper, capsys, name):
+    with pytest.raises(SystemExit):
+        helper.handle_switch({"profile_name": name})
+    return json.loads(capsys.readouterr().out)
+
+
+def test_switch_stops_previous(helper, units, capsys):
+    result = run_switch(helper, capsys, "work")
+    assert result["status"] == "ok"
+    assert result["previous"] == "home"
+    assert units["active"] == ["work"]
+
+
+def test_failed_start_restores_previous(helper, units, capsys):
+    units["broken"].add("work")
+
+    result = run_switch(helper, capsys, "work")
+
+    assert result["code"] == "SWITCH_FAILED"
+    assert "restored home" in result["message"]
+    assert units["active"] == ["home"]
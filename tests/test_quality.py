@@ -0,0 +1,129 @@
+import random
+
+import pytest
+
+from openvpndesk.quality import LogHistogram, QualityProber, QualityWindow, UdpEchoServer
+
+
+# --------------------------------------------------
+# Sliding window
+# --------------------------------------------------
+
+def test_window_evicts_oldest_probes():
+    window = QualityWindow(size=4)
+    for rtt in (10.0, None, 20.0, 30.0, 40.0, None):
+        window.record(rtt)
+
+    # Left in the window: 20, 30, 40, lost
+    snapshot = window.snapshot()
+    assert snapshot["probes"] == 4
+    assert snapshot["lost"] == 1
+    assert snapshot["loss_pct"] == 25.0
+    assert window.histogram.total == 3
+    assert window.histogram.counts[window.histogram.bucket(10.0)] == 0
+    assert window.diff_count == 3
+    assert snapshot["jitter_ms"] == pytest.approx(10.0)
+
+
+def test_window_matches_recomputation_after_wraparound():
+    rng = random.Random(7)
+    size = 16
+    window = QualityWindow(size=size)
+    recorded = []
+    diffs = []
+    last = None
+
+    for _ in range(size * 5 + 3):
+        rtt = None if rng.random() < 0.2 else rng.uniform(1, 500)
+        window.record(rtt)
+        recorded.append(rtt)
+        if rtt is not None and last is not None:
+            diffs.append(abs(rtt - last))
+        else:
+            diffs.append(None)
+        if rtt is not None:
+            last = rtt
+
+    tail = recorded[-size:]
+    tail_diffs = [d for d in diffs[-size:] if d is not None]
+    answered = [r for r in tail if r is not None]
+
+    expected = LogHistogram()
+    for rtt in answered:
+        expected.add(rtt)
+
+    assert window.lost == tail.count(None)
+    assert window.histogram.counts == expected.counts
+    assert window.diff_count == len(tail_diffs)
+    assert window.diff_sum == pytest.approx(sum(tail_diffs))
+
+
+def test_histogram_quantile_bounds():
+    histogram = LogHistogram()
+    for value in range(1, 101):
+        histogram.add(float(value))
+
+    p50 = histogram.quantile(0.5)
+    assert 50 <= p50 <= 50 * 1.13
+    assert histogram.quantile(0.99) >= 99
+    assert LogHistogram().quantile(0.5) is None
+
+
+# --------------------------------------------------
+# Prober against the local echo stand-in
+# --------------------------------------------------
+
+@pytest.fixture
+def echo():
+    servers = []
+
+    def start(delay=0.0, loss=0.0):
+        server = UdpEchoServer(delay=delay, loss=loss).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def run_probes(server, count, timeout=0.25):
+    host, port = server.address
+    prober = QualityProber(host, mode="udp", port=port, timeout=timeout)
+    with prober._open_socket() as sock:
+        for _ in range(count):
+            prober.window.record(prober.probe_once(sock))
+    return prober.window.snapshot()
+
+
+def test_udp_probe_measures_injected_delay(echo):
+    snapshot = run_probes(echo(delay=0.02), 20)
+
+    assert snapshot["lost"] == 0
+    # One bucket is about 12% wide; allow some scheduling slack on top
+    assert 20 <= snapshot["p50_ms"] <= 35
+    assert snapshot["p99_ms"] >= snapshot["p50_ms"]
+
+
+def test_udp_probe_measures_injected_loss(echo):
+    random.seed(3)
+    snapshot = run_probes(echo(delay=0.002, loss=0.3), 60, timeout=0.1)
+
+    assert snapshot["probes"] == 60
+    assert 10 <= snapshot["loss_pct"] <= 50
+    assert snapshot["p50_ms"] is not None
+
+
+def test_prober_thread_records_until_stopped(echo):
+    server = echo()
+    host, port = server.address
+    prober = QualityProber(host, mode="udp", port=port, interval=0.01, timeout=0.2)
+
+    prober.start()
+    prober._thread.join(0.3)
+    prober.stop()
+    prober._thread.join(1)
+
+    assert not prober._thread.is_alive()
+    assert prober.window.snapshot()["probes"] > 3
+    assert prober.window.snapshot()["lost"] == 0
@@ -0,0 +1,302 @@
+import asyncio
+import socket
+import struct
+import threading
+
+import pytest
+
+from openvpndesk import resolver
+from openvpndesk.resolver import ResolverCache
+
+
+class StubDnsServer:
+    """
+    Local UDP DNS server answering A/AAAA queries from a fixed table.
+
+    records: {hostname: {qtype: [addresses]}}; unknown names get NXDOMAIN.
+    """
+
+    def __init__(self, records, ttl=300):
+        self.records = records
+        self.ttl = ttl
+        self.queries = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.address = self.sock.getsockname()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                data, addr = self.sock.recvfrom(512)
+            except OSError:
+                return
+            self.sock.sendto(self._answer(data), addr)
+
+    def _answer(self, query: bytes) -> bytes:
+        query_id = struct.unpack("!H", query[:2])[0]
+
+        labels = []
+        offset = 12
+        while query[offset]:
+            length = query[offset]
+            labels.append(query[offset + 1:offset + 1 + length].decode())
+            offset += 1 + length
+        question = query[12:offset + 5]
+        qtype = struct.unpack("!H", query[offset + 1:offset + 3])[0]
+        host = ".".join(labels)
+        self.queries.append((host, qtype))
+
+        if host not in self.records:
+            return struct.pack("!HHHHHH", query_id, 0x8183, 1, 0, 0, 0) + question
+
+        family = socket.AF_INET if qtype == resolver.QTYPE_A else socket.AF_INET6
+        answers = b""
+        addresses = self.records[host].get(qtype, [])
+        for address in addresses:
+            rdata = socket.inet_pton(family, address)
+            answers += struct.pack("!HHHIH", 0xC00C, qtype, 1, self.ttl, len(rdata)) + rdata
+
+        header = struct.pack("!HHHHHH", query_id, 0x8180, 1, len(addresses), 0, 0)
+        return header + question + answers
+
+
+RECORDS = {
+    "vpn.example.com": {
+        resolver.QTYPE_A: ["198.51.100.7", "198.51.100.8"],
+        resolver.QTYPE_AAAA: ["2001:db8::7"],
+    },
+}
+
+
+def resolve(cache, hosts):
+    return asyncio.run(cache.refresh(hosts))
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return tmp_path / "resolver.json"
+
+
+def test_resolves_through_stub_server(cache_path):
+    with StubDnsServer(RECORDS) as server:
+        cache = ResolverCache(cache_path, nameservers=[server.address])
+        assert resolve(cache, ["vpn.example.com", "203.0.113.1"]) == 1
+
+    assert cache.lookup("VPN.example.com") == ["198.51.100.7", "198.51.100.8", "2001:db8::7"]
+    # IP literals are never sent to the resolver
+    assert {host for host, _ in server.queries} == {"vpn.example.com"}
+
+
+def test_unknown_host_is_not_cached(cache_path):
+    with StubDnsServer(RECORDS) as server:
+        cache = ResolverCache(cache_path, nameservers=[server.address])
+        assert resolve(cache, ["missing.example.com"]) == 0
+    assert cache.lookup("missing.example.com") == []
+
+
+@pytest.mark.parametrize("ttl, expected", [
+    (1, resolver.MIN_TTL),
+    (600, 600),
+    (10 ** 7, resolver.MAX_TTL),
+])
+def test_ttl_is_clamped(cache_path, ttl, expected):
+    with StubDnsServer(RECORDS, ttl=ttl) as server:
+        cache = ResolverCache(cache_path, nameservers=[server.address])
+        resolve(cache, ["vpn.example.com"])
+
+    entry = cache._entries["vpn.example.com"]
+    assert entry["ttl"] == expected
+    assert entry["expires"] == pytest.approx(entry["resolved_at"] + expected)
+
+
+def test_refresh_ahead_and_expiry(cache_path):
+    with StubDnsServer(RECORDS, ttl=1000) as server:
+        cache = ResolverCache(cache_path, nameservers=[server.address])
+        resolve(cache, ["vpn.example.com"])
+
+        resolved_at = cache._entries["vpn.example.com"]["resolved_at"]
+        refresh_at = resolved_at + 1000 * (1 - resolver.REFRESH_AHEAD)
+
+        assert not cache.needs_refresh("vpn.example.com", now=refresh_at - 1)
+        assert cache.needs_refresh("vpn.example.com", now=refresh_at + 1)
+        assert cache.needs_refresh("other.example.com")
+
+        # Fresh entries are not queried again
+        queries = len(server.queries)
+        assert resolve(cache, ["vpn.example.com"]) == 0
+        assert len(server.queries) == queries
+
+    # Still handed out while refresh is due, never once expired
+    assert cache.lookup("vpn.example.com", now=refresh_at + 1)
+    assert cache.lookup("vpn.example.com", now=resolved_at + 1001) == []
+
+
+def _store(cache, host, ttl, now):
+    cache._entries[host] = {
+        "addresses": ["198.51.100.7"],
+        "ttl": ttl,
+        "resolved_at": now,
+        "expires": now + ttl,
+    }
+
+
+@pytest.mark.parametrize("ttl", [resolver.MIN_TTL, 45, 60, 90, 300, 3600])
+def test_scheduled_checks_refresh_before_expiry(cache_path, ttl):
+    """
+    Drive the cache the way the app does: check, start a refresh that
+    lands a second later, schedule the next check by next_check_delay.
+    The entry must never be missing in between.
+    """
+    cache = ResolverCache(cache_path, nameservers=[])
+    host = "vpn.example.com"
+    step = 0.25
+    latency = 1.0
+
+    now = 1_000_000.0
+    end = now + 5 * max(ttl, resolver.MAX_CHECK_INTERVAL)
+    _store(cache, host, ttl, now)
+    next_check = now + cache.next_check_delay([host], now=now)
+    landing = None
+
+    while now < end:
+        if landing is not None and now >= landing:
+            _store(cache, host, ttl, landing)
+            landing = None
+        if now >= next_check:
+            if landing is None and cache.needs_refresh(host, now=now):
+                landing = now + latency
+            delay = cache.next_check_delay([host], now=now)
+            assert 0 < delay <= resolver.MAX_CHECK_INTERVAL
+            next_check = now + delay
+        assert cache.lookup(host, now=now), f"expired at +{now - 1_000_000.0:.2f}s"
+        now += step
+
+
+def test_next_check_delay_bounds(cache_path):
+    cache = ResolverCache(cache_path, nameservers=[])
+    now = 1_000_000.0
+    _store(cache, "long.example.com", 3600, now)
+    _store(cache, "short.example.com", 60, now)
+
+    assert cache.next_check_delay(["long.example.com"], now=now) == resolver.MAX_CHECK_INTERVAL
+    assert cache.next_check_delay(["long.example.com", "short.example.com"], now=now) \
+        == pytest.approx(60 * (1 - resolver.REFRESH_AHEAD))
+    # Unknown or already due hosts are retried soon, IP literals ignored
+    assert cache.next_check_delay(["missing.example.com"], now=now) == resolver.MIN_CHECK_INTERVAL
+    assert cache.next_check_delay(["short.example.com"], now=now + 55) == resolver.MIN_CHECK_INTERVAL
+    assert cache.next_check_delay(["203.0.113.1"], now=now) == resolver.MAX_CHECK_INTERVAL
+
+
+def test_expired_entries_are_not_overrides(cache_path):
+    with StubDnsServer(RECORDS, ttl=60) as server:
+        cache = ResolverCache(cache_path, nameservers=[server.address])
+        resolve(cache, ["vpn.example.com"])
+
+    remotes = [("vpn.example.com", "1194", "udp"), ("203.0.113.1", "443", "tcp")]
+    assert cache.overrides_for(remotes) == {"vpn.example.com": cache.lookup("vpn.example.com")}
+
+    cache._entries["vpn.example.com"]["expires"] = 0
+    assert cache.overrides_for(remotes) == {}
+
+
+def test_cache_persists(cache_path):
+    with StubDnsServer(RECORDS) as server:
+        cache = ResolverCache(cache_path, nameservers=[server.address])
+        resolve(cache, ["vpn.example.com"])
+
+    reloaded = ResolverCache(cache_path, nameservers=[])
+    assert reloaded.lookup("vpn.example.com") == cache.lookup("vpn.example.com")
+    assert not reloaded.needs_refresh("vpn.example.com")
+
+
+def test_corrupt_cache_file_is_ignored(cache_path):
+    cache_path.write_text("{not json")
+    assert ResolverCache(cache_path, nameservers=[]).lookup("vpn.example.com") == []
+
+
+# --------------------------------------------------
+# Helper side: connect-time remote overrides
+# --------------------------------------------------
+
+CONFIG = """client
+dev tun
+remote vpn.example.com 1194 udp
+remote 203.0.113.1 443 tcp
+<connection>
+remote vpn.example.com 1195
+</connection>
+"""
+
+
+def test_apply_inserts_resolved_remotes(helper):
+    updated = helper.apply_resolved_remotes(CONFIG, {"vpn.example.com": ["198.51.100.7", "198.51.100.8"]})
+    assert updated.splitlines() == [
+        "client",
+        "dev tun",
+        helper.RESOLVED_MARKER,
+        "remote 198.51.100.7 1194 udp",
+        helper.RESOLVED_MARKER,
+        "remote 198.51.100.8 1194 udp",
+        "remote vpn.example.com 1194 udp",
+        "remote 203.0.113.1 443 tcp",
+        "<connection>",
+        "remote vpn.example.com 1195",
+        "</connection>",
+    ]
+
+
+def test_apply_replaces_previous_addresses(helper):
+    first = helper.apply_resolved_remotes(CONFIG, {"vpn.example.com": ["198.51.100.7"]})
+    second = helper.apply_resolved_remotes(first, {"vpn.example.com": ["198.51.100.9"]})
+
+    assert "198.51.100.7" not in second
+    assert second.count(helper.RESOLVED_MARKER) == 1
+    assert helper.apply_resolved_remotes(second, {}) == CONFIG
+
+
+def test_marker_only_consumes_remote_lines(helper):
+    content = f"client\n{helper.RESOLVED_MARKER}\ncipher AES-256-GCM\n"
+    assert helper.apply_resolved_remotes(content, {}) == "client\ncipher AES-256-GCM\n"
+
+
+def test_sanitize_drops_reserved_markers(helper):
+    imported = (
+        f"client\n{helper.RESOLVED_MARKER}\nremote vpn.example.com 1194\n"
+        f"{helper.SPLIT_BEGIN}\n{helper.SPLIT_END}\n"
+    )
+    assert helper.sanitize_ovpn(imported) == "client\nremote vpn.example.com 1194\n"
+
+
+def test_connect_rewrite_holds_state_lock(helper, monkeypatch, tmp_path):
+    from contextlib import contextmanager
+
+    conf_path = tmp_path / "work.conf"
+    conf_path.write_text(CONFIG)
+    held = []
+
+    @contextmanager
+    def state_lock():
+        held.append(True)
+        try:
+            yield
+        finally:
+            held.pop()
+
+    def atomic_write(path, content, mode):
+        assert held, "config rewritten without the state lock"
+        path.write_text(content)
+
+    monkeypatch.setattr(helper, "state_lock", state_lock)
+    monkeypatch.setattr(helper, "atomic_write", atomic_write)
+    monkeypatch.setattr(helper, "sync_catalog", lambda force=False: None)
+
+    helper.update_resolved_remotes(conf_path, {"vpn.example.com": ["198.51.100.7"]})
+    assert "remote 198.51.100.7 1194 udp" in conf_path.read_text()
@@ -0,0 +1,132 @@
+import ipaddress
+import random
+
+import pytest
+
+from openvpndesk.routes import (
+    ALL_ADDRESSES,
+    _baseline,
+    _random_networks,
+    compute_routes,
+    interval_to_prefixes,
+    merge,
+    parse_networks,
+    same_address_set,
+    subtract,
+)
+
+
+def nets(*cidrs):
+    return [ipaddress.ip_network(c) for c in cidrs]
+
+
+def assert_minimal_and_equivalent(include, exclude):
+    routes = compute_routes(include, exclude)
+    expected = _baseline(include, exclude)
+    assert same_address_set(routes, expected)
+    # collapse_addresses output is minimal, so the counts must agree
+    assert len(routes) == len(expected)
+    return routes
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_sets_match_ipaddress(seed):
+    rng = random.Random(seed)
+    include = _random_networks(400, rng)
+    exclude = _random_networks(100, rng)
+    assert_minimal_and_equivalent(include, exclude)
+
+
+def test_adjacent_networks_merge():
+    routes = assert_minimal_and_equivalent(nets("10.0.0.0/25", "10.0.0.128/25"), [])
+    assert routes == nets("10.0.0.0/24")
+
+
+def test_overlapping_networks_merge():
+    routes = compute_routes(nets("10.0.0.0/16", "10.0.5.0/24", "10.0.255.0/24"), [])
+    assert routes == nets("10.0.0.0/16")
+
+
+def test_adjacent_but_unaligned_networks_stay_split():
+    routes = assert_minimal_and_equivalent(nets("10.0.1.0/24", "10.0.2.0/24"), [])
+    assert routes == nets("10.0.1.0/24", "10.0.2.0/24")
+
+
+def test_exclude_covering_include_leaves_nothing():
+    assert compute_routes(nets("10.1.2.0/24"), nets("10.0.0.0/8")) == []
+    assert compute_routes(nets("2001:db8::/48"), nets("2001:db8::/32")) == []
+
+
+def test_exclude_splits_include():
+    routes = assert_minimal_and_equivalent(nets("10.0.0.0/24"), nets("10.0.0.128/26"))
+    assert routes == nets("10.0.0.0/25", "10.0.0.192/26")
+
+
+def test_ipv6_and_ipv4_are_independent():
+    routes = assert_minimal_and_equivalent(
+        nets("2001:db8::/32", "10.0.0.0/8"),
+        nets("2001:db8:1::/48", "0.0.0.0/0"),
+    )
+    assert all(net.version == 6 for net in routes)
+    assert ipaddress.ip_network("2001:db8:1::/48") not in routes
+
+
+def test_everything_except():
+    exclude = nets("192.168.0.0/16", "10.0.0.0/8", "fd00::/8")
+    routes = assert_minimal_and_equivalent(list(ALL_ADDRESSES), exclude)
+    assert not any(net.overlaps(ex) for net in routes for ex in exclude)
+
+
+def test_default_routes_pass_through():
+    assert compute_routes(list(ALL_ADDRESSES), []) == list(ALL_ADDRESSES)
+    assert compute_routes(list(ALL_ADDRESSES), list(ALL_ADDRESSES)) == []
+
+
+def test_interval_primitives():
+    assert merge([(5, 9), (0, 4), (20, 30), (25, 26)]) == [(0, 9), (20, 30)]
+    assert subtract([(0, 100)], [(10, 20), (50, 200)]) == [(0, 9), (21, 49)]
+    assert interval_to_prefixes(0, 2 ** 32 - 1, 32) == [(0, 0)]
+    assert interval_to_prefixes(1, 6, 32) == [(1, 32), (2, 31), (4, 31), (6, 32)]
+
+
+def test_parse_networks_masks_host_bits_and_reports_invalid():
+    networks, invalid = parse_networks([
+        "10.0.0.1/24  # office",
+        "",
+        "# comment",
+        "not-a-network",
+        "2001:db8::1/64",
+    ])
+    assert networks == nets("10.0.0.0/24", "2001:db8::/64")
+    assert invalid == ["not-a-network"]
+
+
+# --------------------------------------------------
+# Helper side: rendered config block
+# --------------------------------------------------
+
+def test_split_block_bypasses_server(helper):
+    block = helper.render_split_tunnel(nets("0.0.0.0/0", "10.0.0.0/8", "2001:db8::/32"))
+    lines = block.splitlines()
+
+    assert lines[:3] == [
+        helper.SPLIT_BEGIN,
+        "route-nopull",
+        "route remote_host 255.255.255.255 net_gateway",
+    ]
+    assert "route 0.0.0.0 128.0.0.0" in lines
+    assert "route 10.0.0.0 255.0.0.0" in lines
+    assert "route-ipv6 2001:db8::/32" in lines
+    assert helper.parse_profile_metadata("client\n" + block)["split_routes"] == 4
+    assert helper.render_split_tunnel([]) == ""
+
+
+def test_split_block_never_replaces_default_routes(helper):
+    # What an empty Include list with no IPv6 excludes produces
+    block = helper.render_split_tunnel(compute_routes(list(ALL_ADDRESSES), nets("10.0.0.0/8")))
+    lines = block.splitlines()
+
+    assert "route-ipv6 ::/1" in lines
+    assert "route-ipv6 8000::/1" in lines
+    assert "route-ipv6 ::/0" not in lines
+    assert not any(line.startswith("route 0.0.0.0 0.0.0.0") for line in lines)
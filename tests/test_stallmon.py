@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("gi")
+
+from openvpndesk import stallmon  # noqa: E402
+from openvpndesk.stallmon import handler_name  # noqa: E402
+
+
+def define(filename, source):
+    """Functions compiled as if they lived in filename."""
+    namespace = {"sys": sys}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace
+
+
+APP = define(os.path.join(stallmon.PACKAGE_DIR, "fake_app.py"), """
+def main(loop, handler):
+    entry = []
+    frame = sys._getframe()
+    while frame is not None:
+        entry.append(frame)
+        frame = frame.f_back
+    return run(loop, handler), entry
+
+def run(loop, handler):
+    return loop(handler)
+
+def on_refresh_clicked(capture):
+    return helper(capture)
+
+def helper(capture):
+    return capture()
+""")
+
+GTK = define("/usr/lib/python3/dist-packages/gi/overrides/Gtk.py", """
+def main_with_handler(handler):
+    return handler()
+
+def main_idle(capture):
+    return capture()
+""")
+
+
+def capture():
+    return sys._getframe(1)
+
+
+def test_handler_called_from_the_loop_is_named():
+    frame, entry = APP["main"](
+        GTK["main_with_handler"], lambda: APP["on_refresh_clicked"](capture)
+    )
+    assert handler_name(frame, entry) == "on_refresh_clicked"
+
+
+def test_stall_without_handler_is_the_main_loop():
+    frame, entry = APP["main"](GTK["main_idle"], capture)
+    assert handler_name(frame, entry) == "<main loop>"
+    # Without the entry frames main() itself would be blamed
+    assert handler_name(frame) == "main"
@@ -0,0 +1,86 @@
+import pytest
+
+from openvpndesk import tunnelbench
+from openvpndesk.tunnelbench import BenchServer, is_storable, run_benchmark, summarize_by_config
+
+
+@pytest.fixture
+def server():
+    server = BenchServer("127.0.0.1", 0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def connected(monkeypatch):
+    """Pretend the profile's openvpn runs with the given PIDs, in turn."""
+    def set_pids(*pids):
+        remaining = list(pids)
+        monkeypatch.setattr(
+            tunnelbench, "openvpn_pid",
+            lambda name: remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        )
+    return set_pids
+
+
+@pytest.fixture
+def through_tun(monkeypatch):
+    monkeypatch.setattr(tunnelbench, "route_device", lambda host: "tun0")
+    monkeypatch.setattr(tunnelbench, "is_tunnel_device", lambda device: True)
+
+
+def test_profile_that_is_not_connected_is_refused(server, connected):
+    connected(None)
+    with pytest.raises(ValueError, match="work is not connected"):
+        run_benchmark("work", server.address, seconds=0.2)
+
+
+def test_untunneled_endpoint_is_refused(server, connected):
+    connected(4242)
+    with pytest.raises(ValueError, match="not through the VPN tunnel"):
+        run_benchmark("work", server.address, seconds=0.2)
+
+
+def test_switch_during_run_is_refused(server, connected, through_tun):
+    connected(4242, 5353)
+    with pytest.raises(ValueError, match="disconnected during the benchmark"):
+        run_benchmark("work", server.address, seconds=0.2, udp_mbps=5)
+
+
+def test_tunneled_run_is_storable(server, connected, through_tun):
+    connected(4242)
+    result = run_benchmark("work", server.address, seconds=0.2, udp_mbps=5)
+
+    assert result["device"] == "tun0"
+    assert is_storable(result)
+
+
+def test_local_dry_run(server, connected):
+    connected(None)
+    result = run_benchmark("work", server.address, seconds=0.2, udp_mbps=5,
+                           allow_untunneled=True)
+
+    assert result["tunneled"] is False
+    assert result["connected"] is False
+    assert not is_storable(result)
+    assert result["device"] == "lo"
+    assert result["tcp_upload_mbps"] > 0
+    assert result["tcp_download_mbps"] > 0
+    assert result["udp_loss_pct"] is not None
+    assert result["openvpn_cpu_pct"] is None
+
+
+def test_summary_medians_per_config():
+    results = [
+        {"time": 1, "config_sha256": "a", "tcp_upload_mbps": 10.0, "tcp_download_retransmits": 4},
+        {"time": 2, "config_sha256": "b", "tcp_upload_mbps": 50.0, "tcp_download_retransmits": 0},
+        {"time": 3, "config_sha256": "a", "tcp_upload_mbps": 30.0, "tcp_download_retransmits": 2},
+        {"time": 4, "config_sha256": "a", "tcp_upload_mbps": 20.0, "tcp_download_retransmits": None},
+    ]
+    first, second = summarize_by_config(results)
+
+    assert (first["config_sha256"], first["runs"], first["last"]) == ("a", 3, 4)
+    assert first["tcp_upload_mbps"] == 20.0
+    assert first["tcp_download_retransmits"] == 3
+    assert first["udp_mbps"] is None
+    assert second["tcp_upload_mbps"] == 50.0